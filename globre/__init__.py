@@ -20,10 +20,25 @@
 #------------------------------------------------------------------------------
 
 import re
+import sys
+import time
+import threading
+from array import array
+from collections import OrderedDict
 
 # new flags that apply to globs only...
-EXACT = 1 << 10
-E     = EXACT
+EXACT     = 1 << 10
+E         = EXACT
+FORCE_RE  = 1 << 11
+LINEAR    = 1 << 12
+CAPTURE   = 1 << 13
+NORMSEP   = 1 << 14
+GLOBFLAGS = EXACT | FORCE_RE | LINEAR | CAPTURE | NORMSEP
+
+# the instrumentation callback (see `set_profiler`), and the clock it
+# is given elapsed times of
+_profiler = None
+_clock    = getattr(time, 'perf_counter', time.time)
 
 #------------------------------------------------------------------------------
 class Tokenizer(object):
@@ -33,78 +48,112 @@ class Tokenizer(object):
   ANY      = 'any'        # **
   RANGE    = 'range'      # [...]
   REGEX    = 'regex'      # {...}
+  # the compact integer codes of the token types (see `CompiledGlob`)
+  TYPES    = (LITERAL, SINGLE, MULTIPLE, ANY, RANGE, REGEX)
+  codes    = dict((type, code) for code, type in enumerate(TYPES))
   submap   = {
     '[' : (']', RANGE),
     '{' : ('}', REGEX),
     }
+  # runs of literal characters and escape sequences, i.e. everything
+  # up to the next special character or dangling backslash
+  literal_cre = re.compile(r'(?:[^\\?*[{]|\\.)+', re.DOTALL)
+  scan_cres   = dict(
+    (target, re.compile(r'(?:[^\\%s]|\\.)*' % (re.escape(target),), re.DOTALL))
+    for target, _ in submap.values())
+  unescape_cre = re.compile(r'\\(.)', re.DOTALL)
   def __init__(self, source):
     self.source = source
     self.pos    = 0
-  def tokens(self):
+  def tokens(self, aslist=False):
     '''
-    Generates four-element tuples of: (type, value, start, end).
+    Generates four-element tuples of: (type, value, start, end). If
+    `aslist` is truthy, all the tokens are returned as a list instead.
     '''
-    for token in self._outer():
-      yield token
+    if aslist:
+      return list(self._outer())
+    return self._outer()
+  def _unescape(self, value):
+    if '\\' not in value:
+      return value
+    # splitting on the escape sequences interleaves the unescaped text
+    # with the escaped characters (much faster than `re.sub`)
+    return ''.join(self.unescape_cre.split(value))
   def _outer(self):
-    start = self.pos
-    value = ''
-    while self.pos < len(self.source):
-      cur = self.source[self.pos]
-      if cur not in '\\?*[{':
-        value += cur
-        self.pos += 1
-        continue
+    # note: `pos` is a local copy of `self.pos`, which is only updated
+    #       when yielding (or scanning) to avoid attribute access costs
+    source  = self.source
+    end     = len(source)
+    literal = self.literal_cre.match
+    split   = self.unescape_cre.split
+    pos     = self.pos
+    start   = pos
+    value   = ''
+    while pos < end:
+      match = literal(source, pos)
+      if match:
+        value = match.group()
+        if '\\' in value:
+          value = ''.join(split(value))
+        pos = match.end()
+        if pos >= end:
+          break
+      cur = source[pos]
       if cur == '\\':
-        self.pos += 1
-        if self.pos >= len(self.source):
-          raise ValueError('dangling backslash "\\" in glob: %s' % (self.source,))
-        value += self.source[self.pos]
-        self.pos += 1
-        continue
+        self.pos = pos
+        raise ValueError('dangling backslash "\\" in glob: %s' % (source,))
       if len(value) > 0:
-        yield (self.LITERAL, value, start, self.pos)
-      self.pos += 1
+        self.pos = pos
+        yield (self.LITERAL, value, start, pos)
+      pos  += 1
       value = ''
-      start = self.pos
+      start = pos
       if cur == '?':
+        self.pos = pos
         yield (self.SINGLE, '?', start - 1, start)
         continue
       if cur == '*':
-        if self.pos >= len(self.source) or self.source[self.pos] != '*':
+        if pos >= end or source[pos] != '*':
+          self.pos = pos
           yield (self.MULTIPLE, '*', start - 1, start)
           continue
+        pos += 1
+        self.pos = pos
         yield (self.ANY, '**', start - 1, start + 1)
-        self.pos += 1
-        start = self.pos
+        start = pos
         continue
       if cur in self.submap:
         spec = self.submap[cur]
+        self.pos = pos
         value = self._scan(spec[0])
+        pos = self.pos
         if len(value) > 0:
-          yield (spec[1], value, start - 1, self.pos)
+          yield (spec[1], value, start - 1, pos)
         value = ''
-        start = self.pos
+        start = pos
         continue
+      self.pos = pos
       raise ValueError('unexpected glob character "%s" in glob: %s'
-                       % (cur, self.source))
+                       % (cur, source))
+    self.pos = pos
     if len(value) > 0:
-      yield (self.LITERAL, value, start, self.pos)
+      yield (self.LITERAL, value, start, pos)
   def _scan(self, target):
-    value = ''
-    while self.pos < len(self.source):
-      cur = self.source[self.pos]
-      self.pos += 1
-      if cur == '\\':
-        if self.pos >= len(self.source):
-          raise ValueError('dangling backslash "\\" in glob: %s' % (self.source,))
-        value += self.source[self.pos]
-        self.pos += 1
-        continue
-      if cur == target:
-        return value
-      value += cur
-    raise ValueError('no terminating "%s" in glob: %s' % (target, self.source))
+    source = self.source
+    end = source.find(target, self.pos)
+    if end >= 0 and source.find('\\', self.pos, end) < 0:
+      value = source[self.pos:end]
+      self.pos = end + 1
+      return value
+    match = self.scan_cres[target].match(source, self.pos)
+    self.pos = match.end()
+    if self.pos >= len(source):
+      raise ValueError('no terminating "%s" in glob: %s' % (target, source))
+    if source[self.pos] == '\\':
+      # the only backslash that cannot be matched is a trailing one
+      raise ValueError('dangling backslash "\\" in glob: %s' % (source,))
+    self.pos += 1
+    return self._unescape(match.group())
 
 WILDCHARS       = '?*[{\\'
 SPECIAL_CHARS   = '?*[]{}'
@@ -116,6 +165,316 @@ def iswild(pattern):
       return True
   return False
 
+#------------------------------------------------------------------------------
+class FastMatch(tuple):
+  '''
+  The match object returned by `FastPattern`, which implements the
+  commonly used subset of the `re` match object API. (It is a tuple
+  subclass only because that makes creating it cheap.)
+  '''
+  __slots__ = ()
+  pos       = 0
+  lastindex = None
+  lastgroup = None
+  re        = property(lambda self: tuple.__getitem__(self, 0))
+  string    = property(lambda self: tuple.__getitem__(self, 1))
+  endpos    = property(lambda self: len(tuple.__getitem__(self, 1)))
+  def _check(self, group):
+    if group != 0:
+      raise IndexError('no such group')
+  def span(self, group=0):
+    self._check(group)
+    return tuple.__getitem__(self, slice(2, 4))
+  def start(self, group=0):
+    return self.span(group)[0]
+  def end(self, group=0):
+    return self.span(group)[1]
+  def group(self, *groups):
+    if len(groups) > 1:
+      return tuple(self.group(group) for group in groups)
+    start, end = self.span(groups[0] if groups else 0)
+    return self.string[start:end]
+  __getitem__ = group
+  def groups(self, default=None):
+    return ()
+  def groupdict(self, default=None):
+    return {}
+  def expand(self, template):
+    return self.re.regex.match(self.string, self.start()).expand(template)
+  def __repr__(self):
+    return '<globre.FastMatch object; span=%r, match=%r>' % (
+      self.span(), self.group())
+
+#------------------------------------------------------------------------------
+class FastPattern(object):
+  '''
+  A regex-compatible matcher for globs of the shape ``A**B`` (where
+  ``A`` and ``B`` are literals, either of which may be empty), which
+  implements `match` and `search` with plain string operations
+  instead of a regular expression. For these globs, the regex has to
+  step through the string with the non-greedy ``.*?``, which is
+  significantly slower than `str.startswith` and `str.endswith`.
+  (Other simple shapes, such as pure literals or ``A*B``, are left to
+  the regex, since `re` already handles them faster than any Python-
+  level string operations can.)
+
+  The results are identical to those of the equivalent regex, which
+  is compiled lazily (and is available as the `regex` attribute) for
+  any call that cannot be handled with string operations (e.g. when
+  the `pos` or `endpos` parameters are used, or the string contains
+  a newline) and for all other regex methods and attributes.
+  '''
+  groups     = 0
+  groupindex = {}
+  def __init__(self, pattern, flags, head, tail):
+    self.pattern = pattern
+    self.head    = head
+    self.tail    = tail
+    self.exact   = bool(flags & EXACT)
+    self._flags  = flags & ~ GLOBFLAGS
+    self._regex  = None
+    # the matching methods are closures specialized for the pattern,
+    # as that is what makes them faster than the regex
+    self.match   = self._match()
+    self.search  = self._match() if self.exact else self._search()
+  @classmethod
+  def create(cls, tokens, expr, flags, sep):
+    '''
+    Returns a FastPattern for the glob `tokens` (as generated by
+    `Tokenizer.tokens`) if they have a supported shape and the `flags`
+    and `sep` allow it, otherwise ``None``. The `expr` parameter is
+    the translated regex source.
+    '''
+    if flags & ~ ( GLOBFLAGS | re.DOTALL | re.UNICODE ) \
+        or not isinstance(expr, str):
+      return None
+    types = [token[0] for token in tokens]
+    head = tail = ''
+    if types and types[0] == Tokenizer.LITERAL:
+      head = tokens[0][1]
+      tokens, types = tokens[1:], types[1:]
+    if types and types[-1] == Tokenizer.LITERAL:
+      tail = tokens[-1][1]
+      types = types[:-1]
+    if types != [Tokenizer.ANY] or not ( tail or flags & EXACT ):
+      return None
+    if len(sep) > 1 and set(head + tail) & set(sep):
+      # literal separators match any of the separators
+      return None
+    return cls(expr, flags, head, tail)
+  @property
+  def regex(self):
+    if self._regex is None:
+      self._regex = re.compile(self.pattern, self._flags)
+    return self._regex
+  def __getattr__(self, attr):
+    if attr.startswith('__'):
+      raise AttributeError(attr)
+    return getattr(self.regex, attr)
+  def __repr__(self):
+    return 'globre.FastPattern(%r)' % (self.pattern,)
+  def _fallback(self, method, string, pos, endpos):
+    if endpos is None:
+      return getattr(self.regex, method)(string, pos)
+    return getattr(self.regex, method)(string, pos, endpos)
+  # note: the "\n" tests below also reject non-string parameters,
+  #       since those are delegated to the regex, which raises TypeError
+  def _match(self):
+    head, tail = self.head, self.tail
+    hlen, tlen = len(head), len(tail)
+    fallback   = self._fallback
+    new        = tuple.__new__
+    if self.exact:
+      def match(string, pos=0, endpos=None):
+        if pos or endpos is not None or '\n' in string:
+          return fallback('match', string, pos, endpos)
+        end = len(string)
+        if end - hlen < tlen or not string.startswith(head) \
+            or not string.endswith(tail):
+          return None
+        return new(FastMatch, (self, string, 0, end))
+      return match
+    def match(string, pos=0, endpos=None):
+      if pos or endpos is not None or '\n' in string:
+        return fallback('match', string, pos, endpos)
+      if not string.startswith(head):
+        return None
+      mid = string.find(tail, hlen)
+      if mid < 0:
+        return None
+      return new(FastMatch, (self, string, 0, mid + tlen))
+    return match
+  def _search(self):
+    head, tail = self.head, self.tail
+    hlen, tlen = len(head), len(tail)
+    fallback   = self._fallback
+    new        = tuple.__new__
+    def search(string, pos=0, endpos=None):
+      if pos or endpos is not None or '\n' in string:
+        return fallback('search', string, pos, endpos)
+      start = string.find(head)
+      if start < 0:
+        return None
+      mid = string.find(tail, start + hlen)
+      if mid < 0:
+        return None
+      return new(FastMatch, (self, string, start, mid + tlen))
+    return search
+  def fullmatch(self, string, *args):
+    return self.regex.fullmatch(string, *args)
+
+#------------------------------------------------------------------------------
+class Match(object):
+  '''
+  The match object returned by `CapturePattern`, which wraps the `re`
+  match object `match` and provides access to the values matched by
+  each wildcard (``?``, ``*``, ``**`` and ``[...]``) of the glob by the
+  index of its token (as generated by `Tokenizer.tokens`). All other
+  attributes, including ``match[group]``, are those of `match`, i.e.
+  they refer to regex groups, not to token indexes.
+  '''
+  __slots__ = ('match', 'indexes')
+  def __init__(self, match, indexes):
+    self.match   = match
+    self.indexes = indexes
+  def __getattr__(self, attr):
+    return getattr(self.match, attr)
+  def __getitem__(self, group):
+    return self.match.group(group)
+  def value(self, index):
+    '''
+    Returns the string matched by the wildcard token `index`.
+    '''
+    return self.match.group('w%d' % (index,))
+  def wildcard_span(self, index):
+    '''
+    Returns the ``(start, end)`` span of the string matched by the
+    wildcard token `index`.
+    '''
+    return self.match.span('w%d' % (index,))
+  def values(self):
+    '''
+    Returns a dict of the strings matched by each wildcard, keyed by
+    token index.
+    '''
+    return dict((index, self.value(index)) for index in self.indexes)
+  def wildcards(self):
+    '''
+    Returns a list of ``(index, value, (start, end))`` tuples for each
+    wildcard, in pattern order.
+    '''
+    return [(index, self.value(index), self.wildcard_span(index))
+            for index in self.indexes]
+  def __repr__(self):
+    return '<globre.Match object; span=%r, wildcards=%r>' % (
+      self.span(), self.values())
+
+#------------------------------------------------------------------------------
+class CapturePattern(object):
+  '''
+  The object returned by `globre.compile` for the ``globre.CAPTURE``
+  flag: it wraps the compiled `regex`, in which each wildcard token is
+  a named group, and returns `globre.Match` objects from `match`,
+  `search` and `fullmatch`. The `indexes` attribute lists the token
+  indexes of the wildcards. All other attributes are those of `regex`.
+  '''
+  def __init__(self, regex, indexes):
+    self.regex   = regex
+    self.indexes = tuple(indexes)
+  def __getattr__(self, attr):
+    if attr.startswith('__'):
+      raise AttributeError(attr)
+    return getattr(self.regex, attr)
+  def __repr__(self):
+    return 'globre.CapturePattern(%r)' % (self.regex.pattern,)
+  def _wrap(self, match):
+    if match is None:
+      return None
+    return Match(match, self.indexes)
+  def match(self, string, *args):
+    return self._wrap(self.regex.match(string, *args))
+  def search(self, string, *args):
+    return self._wrap(self.regex.search(string, *args))
+  def fullmatch(self, string, *args):
+    return self._wrap(self.regex.fullmatch(string, *args))
+
+#------------------------------------------------------------------------------
+class NormalizedPattern(object):
+  '''
+  The object returned by `globre.compile` for the ``globre.NORMSEP``
+  flag with a multi-character `sep`: it wraps the `regex` compiled for
+  the first separator only, and replaces all the other separators of
+  the strings given to `match`, `search`, `fullmatch`, `findall` and
+  `finditer` with the first one before matching them (which does not
+  move any character, so all spans are those of the original string).
+  Strings given to any other method must be normalized with
+  `normalize` first. All other attributes are those of `regex`.
+  Buffers without a `replace` method (e.g. `memoryview` and `mmap`)
+  are normalized in a bytes copy.
+  '''
+  def __init__(self, regex, sep):
+    self.regex  = regex
+    self.sep    = sep
+    # note: `str.replace` is an order of magnitude faster than
+    #       `str.translate` with a table, even if called once per separator
+    self.first  = sep[:1]
+    self.others = [sep[idx:idx + 1] for idx in range(1, len(sep))]
+    # as with FastPattern, the matching methods are closures, since the
+    # normalization is only worthwhile if little is added around it
+    for name in ('match', 'search', 'fullmatch', 'findall', 'finditer'):
+      if hasattr(regex, name):
+        setattr(self, name, self._normalized(getattr(regex, name)))
+  def __getattr__(self, attr):
+    if attr.startswith('__'):
+      raise AttributeError(attr)
+    return getattr(self.regex, attr)
+  def __repr__(self):
+    return 'globre.NormalizedPattern(%r, %r)' % (self.regex, self.sep)
+  def normalize(self, string):
+    '''
+    Returns `string` with all separators translated into the first one.
+    '''
+    if not hasattr(string, 'replace'):
+      # e.g. memoryview or mmap
+      string = bytes(string)
+    for char in self.others:
+      string = string.replace(char, self.first)
+    return string
+  def _normalized(self, method):
+    if len(self.others) > 1:
+      normalize = self.normalize
+      def _method(string, *args):
+        return method(normalize(string), *args)
+      return _method
+    other, first = self.others[0], self.first
+    def _method(string, *args):
+      try:
+        string = string.replace(other, first)
+      except AttributeError:
+        # e.g. memoryview or mmap
+        string = bytes(string).replace(other, first)
+      return method(string, *args)
+    return _method
+
+#------------------------------------------------------------------------------
+# the characters that `re.escape` escapes, other than alphanumerics
+# (which it never escapes) and non-ASCII characters (which are never
+# special), and the literal translation tables built from them
+_escaped = [char for char in map(chr, range(128))
+            if not char.isalnum() and re.escape(char) != char]
+_literal_tables = {}
+
+def _literal_table(sep):
+  # the `str.translate` table that converts a literal into a regex for
+  # the multi-character `sep`, in which any separator matches any other
+  ret = _literal_tables.get(sep)
+  if ret is None:
+    ret = dict((ord(char), re.escape(char)) for char in _escaped)
+    anysep = '[' + re.escape(sep) + ']'
+    ret.update((ord(char), anysep) for char in sep)
+    _literal_tables[sep] = ret
+  return ret
+
 #------------------------------------------------------------------------------
 def compile(pattern, flags=0, sep=None, split_prefix=False):
   '''
@@ -150,6 +509,28 @@ def compile(pattern, flags=0, sep=None, split_prefix=False):
     addition to the ``globre.EXACT`` flag. If EXACT is set, then the
     returned regex will include a leading '^' and trailing '$', meaning
     that the regex must match the entire string, from beginning to end.
+    If the ``globre.FORCE_RE`` flag is set, a regex object is always
+    returned (see below). If the ``globre.LINEAR`` flag is set, a
+    `globre.engine.LinearPattern` is returned instead of a regex
+    object, which never backtracks and therefore matches in linear
+    time; it only supports `match`, `search` and `fullmatch`, and it
+    rejects globs with inline regex (``{...}``), ranges with an escaped
+    ``]`` other than as their first character, and the ``re.MULTILINE``
+    flag with a ValueError.
+    If the ``globre.CAPTURE`` flag is set, each wildcard (``?``, ``*``,
+    ``**`` and ``[...]``) is wrapped in a named group and a
+    `globre.CapturePattern` is returned, whose matching methods return
+    `globre.Match` objects that provide the value and span matched by
+    each wildcard by token index (see `Tokenizer.tokens`).
+    If the ``globre.NORMSEP`` flag is set and `sep` has several
+    characters, the separators in the glob's literals are normalized to
+    the first one, the glob is compiled for that separator alone (and
+    therefore uses the faster single-separator translation and fast
+    paths), and a `globre.NormalizedPattern` is returned, which
+    normalizes the separators of the strings it matches the same way
+    (with one `str.replace` call per additional separator, which is
+    faster than a `str.translate` table). Note that ranges (``[...]``)
+    and inline regexes (``{...}``) then only see the first separator.
 
   split_prefix : bool; default: false
 
@@ -158,72 +539,416 @@ def compile(pattern, flags=0, sep=None, split_prefix=False):
     the pattern. The second element remains the regex object as before.
     For example, the pattern ``foo/**.ini`` would result in a tuple
     equivalent to ``('foo/', re.compile('foo/.*\\.ini'))``.
+
+  If `pattern` is a bytes object, a bytes regex is returned (and the
+  prefix, if requested, is bytes too), which matches `bytes`,
+  `bytearray`, `memoryview` and `mmap` objects directly, i.e. without
+  decoding or copying them, and supports the `pos` and `endpos`
+  parameters to match a record within a larger buffer (see
+  `globre.scan_records`). In that case, `sep` may also be given as
+  bytes, and wildcards match bytes, not characters. Bytes globs are
+  not supported with ``globre.LINEAR``.
+
+  Globs of the form ``A**B`` (where ``A`` and ``B`` are literals)
+  without any `re` flags other than ``re.DOTALL`` are compiled into
+  a `globre.FastPattern` instead, which has the same interface and
+  results as the regex object, but uses plain string operations to
+  match.
+
+  While a profiler is installed (see `globre.set_profiler`), the time
+  spent in the ``tokenize``, ``translate`` and ``compile`` (i.e.
+  ``re.compile`` or the construction of the fast or linear matcher)
+  phases is reported to it.
   '''
 
+  profiler = _profiler
+  if profiler is not None:
+    started = _clock()
+    glob    = pattern
+
   prefix = None
   expr   = ''
 
+  # bytes patterns are translated as latin-1 text, which maps each byte
+  # to the character with the same code, and the result encoded back
+  asbytes = isinstance(pattern, (bytes, bytearray))
+  if asbytes:
+    pattern = bytes(pattern).decode('latin-1')
+  if isinstance(sep, (bytes, bytearray)):
+    sep = bytes(sep).decode('latin-1')
   if sep is None:
     sep = '/'
   if not sep:
     TypeError('invalid parameter "sep" value: %r' % (sep,))
   if set(sep) & set(SPECIAL_CHARS):
     TypeError('parameter "sep" cannot contain any of %r' % (SPECIAL_CHARS,))
+
+  capture = []
+  tokens  = Tokenizer(pattern).tokens(aslist=True)
+
+  normsep = None
+  if flags & NORMSEP and len(sep) > 1:
+    # the literal separators are normalized to the first one (as are
+    # those of the strings matched), so the glob is compiled for it alone
+    normsep = sep
+    sep     = sep[0]
+    for char in normsep[1:]:
+      tokens = [
+        (token[0], token[1].replace(char, sep), token[2], token[3])
+        if token[0] == Tokenizer.LITERAL else token
+        for token in tokens]
   if len(sep) == 1:
     literal = re.escape
   else:
-    def make_literal(sep):
-      sep = '[' + re.escape(sep) + ']'
-      sepcre = re.compile(sep)
-      def _literal(text):
-        return sep.join(sepcre.split(text))
-      return _literal
-    literal = make_literal(sep)
+    # any literal separator matches any of the separators
+    table = _literal_table(sep)
+    def literal(text):
+      return text.translate(table)
+  rawsep = sep
   if sep != '/':
     sep = re.escape(sep)
 
-  for token in Tokenizer(pattern).tokens():
+  if profiler is not None:
+    now = _clock()
+    profiler('tokenize', glob, now - started)
+    started = now
+
+  for index, token in enumerate(tokens):
     if split_prefix and expr == '':
       prefix = token[1] if token[0] == Tokenizer.LITERAL else ''
     if token[0] == Tokenizer.LITERAL:
       expr += literal(token[1])
+      continue
     elif token[0] == Tokenizer.SINGLE:
-      expr += '[^' + sep + ']'
+      part = '[^' + sep + ']'
     elif token[0] == Tokenizer.MULTIPLE:
-      expr += '[^' + sep + ']*?'
+      part = '[^' + sep + ']*?'
     elif token[0] == Tokenizer.ANY:
-      expr += '.*?'
+      part = '.*?'
     elif token[0] == Tokenizer.RANGE:
-      expr += '[' + token[1] + ']'
+      part = '[' + token[1] + ']'
     elif token[0] == Tokenizer.REGEX:
       expr += token[1]
+      continue
     else:
       ValueError('unexpected token %r from globre.Tokenizer for glob: %s'
                  % (token, pattern))
+      continue
+    if flags & CAPTURE:
+      capture.append(index)
+      part = '(?P<w%d>%s)' % (index, part)
+    expr += part
 
   if flags & EXACT:
     if not expr.startswith('^'):
       expr = '^' + expr
-    # todo: technically, the last "$" *could* be escaped and therefore
-    #       an extra "$" would need to be added... but that is very unlikely.
-    if not expr.endswith('$'):
+    # (a trailing "$" is only an anchor if it is not escaped, i.e. if it
+    # is preceded by an even number of backslashes, e.g. from "{...$}")
+    if not expr.endswith('$') \
+        or ( len(expr) - 1 - len(expr[:-1].rstrip('\\')) ) % 2:
       expr += '$'
 
-  expr = re.compile(expr, flags=flags & ~ EXACT)
+  if profiler is not None:
+    now = _clock()
+    profiler('translate', glob, now - started, expr)
+    started = now
+
+  fast = None
+  if asbytes:
+    if flags & LINEAR:
+      raise ValueError('globre.LINEAR does not support bytes glob: %r' % (pattern,))
+    expr = expr.encode('latin-1')
+    if prefix is not None:
+      prefix = prefix.encode('latin-1')
+  if flags & LINEAR:
+    if flags & CAPTURE:
+      raise ValueError('globre.LINEAR does not support globre.CAPTURE')
+    fast = engine.LinearPattern(pattern, expr, flags, normsep or rawsep)
+  elif not flags & ( FORCE_RE | CAPTURE ):
+    fast = FastPattern.create(tokens, expr, flags, rawsep)
+  if fast is not None:
+    expr = fast
+  else:
+    expr = re.compile(expr, flags=flags & ~ GLOBFLAGS)
+    if flags & CAPTURE:
+      expr = CapturePattern(expr, capture)
+
+  if normsep is not None:
+    if asbytes:
+      normsep = normsep.encode('latin-1')
+    expr = NormalizedPattern(expr, normsep)
+
+  if profiler is not None:
+    profiler('compile', glob, _clock() - started)
 
   if prefix is not None:
     return (prefix, expr)
   return expr
 
+#------------------------------------------------------------------------------
+class CompiledGlob(object):
+  '''
+  A compact representation of the glob `pattern` (see `globre.compile`
+  for details on `sep` and `flags`) for holding very many globs in
+  memory: it only stores the `source` glob, its literal `prefix` (as
+  returned by ``compile(..., split_prefix=True)``) and the `types` of
+  its tokens as an ``array('B')`` of `Tokenizer.codes`, which is enough
+  to tell what kind of glob it is. The matcher returned by
+  `globre.compile` (the `matcher` attribute) is only compiled the first
+  time that it is needed, e.g. by `match`, `search` or `fullmatch`.
+  '''
+  __slots__ = ('source', 'sep', 'flags', 'prefix', 'types', '_matcher')
+  def __init__(self, pattern, sep=None, flags=0):
+    self.source   = pattern
+    self.sep      = sep
+    self.flags    = flags
+    self._matcher = None
+    tokens     = self.tokens()
+    self.types = array('B', [Tokenizer.codes[token[0]] for token in tokens])
+    prefix     = tokens[0][1] if self.types and not self.types[0] else ''
+    if flags & NORMSEP and sep and len(sep) > 1:
+      if isinstance(sep, (bytes, bytearray)):
+        sep = bytes(sep).decode('latin-1')
+      for char in sep[1:]:
+        prefix = prefix.replace(char, sep[0])
+    if isinstance(pattern, (bytes, bytearray)):
+      prefix = prefix.encode('latin-1')
+    self.prefix = prefix
+  def __repr__(self):
+    return 'globre.CompiledGlob(%r)' % (self.source,)
+  @property
+  def matcher(self):
+    if self._matcher is None:
+      self._matcher = compile(self.source, flags=self.flags, sep=self.sep)
+    return self._matcher
+  @property
+  def iscompiled(self):
+    '''
+    Whether the `matcher` has been compiled yet.
+    '''
+    return self._matcher is not None
+  @property
+  def isliteral(self):
+    '''
+    Whether the glob has no wildcards, i.e. only matches its `prefix`.
+    '''
+    return not any(self.types)
+  def has(self, *types):
+    '''
+    Returns whether the glob has any token of the `Tokenizer` `types`,
+    e.g. ``glob.has(Tokenizer.REGEX)``.
+    '''
+    codes = set(Tokenizer.codes[type] for type in types)
+    return any(code in codes for code in self.types)
+  def tokens(self):
+    '''
+    Returns the list of the tokens of the glob (see `Tokenizer.tokens`),
+    which are those of its latin-1 decoding if it is bytes.
+    '''
+    source = self.source
+    if isinstance(source, (bytes, bytearray)):
+      source = bytes(source).decode('latin-1')
+    return Tokenizer(source).tokens(aslist=True)
+  def match(self, string, *args):
+    return self.matcher.match(string, *args)
+  def search(self, string, *args):
+    return self.matcher.search(string, *args)
+  def fullmatch(self, string, *args):
+    return self.matcher.fullmatch(string, *args)
+
+#------------------------------------------------------------------------------
+class PatternCache(object):
+  '''
+  A bounded, thread-safe cache of compiled glob patterns, keyed on
+  ``(pattern, flags, sep, split_prefix)``. It is used by the
+  convenience functions `globre.match` and `globre.search` so that
+  repeatedly matching the same globs does not re-tokenize and
+  re-translate them on every call (Python's own `re` cache only kicks
+  in *after* that work has been done, and is purged quite eagerly).
+
+  :Parameters:
+
+  maxsize : int; default: 512
+
+    The maximum number of compiled patterns to hold. If ``None``, the
+    cache is unbounded; if ``0``, caching is disabled.
+
+  policy : str; default: ``PatternCache.LRU``
+
+    The eviction policy to apply once `maxsize` is reached: either
+    ``PatternCache.LRU`` (evict the least-recently used pattern) or
+    ``PatternCache.FIFO`` (evict the oldest inserted pattern, which
+    avoids re-ordering the cache on every hit).
+  '''
+  LRU      = 'lru'
+  FIFO     = 'fifo'
+  policies = (LRU, FIFO)
+  def __init__(self, maxsize=512, policy=LRU):
+    self.lock      = threading.Lock()
+    self.entries   = OrderedDict()
+    self.hits      = 0
+    self.misses    = 0
+    self.evictions = 0
+    self.maxsize   = None
+    self.policy    = self.LRU
+    self.configure(maxsize, policy=policy)
+  def configure(self, maxsize, policy=None):
+    '''
+    Changes the `maxsize` and, if specified, the `policy` of this
+    cache. If the new `maxsize` is smaller than the current number of
+    entries, the excess entries are evicted.
+    '''
+    if policy is None:
+      policy = self.policy
+    if policy not in self.policies:
+      raise ValueError('invalid PatternCache policy: %r' % (policy,))
+    if maxsize is not None and maxsize < 0:
+      raise ValueError('invalid PatternCache maxsize: %r' % (maxsize,))
+    with self.lock:
+      self.maxsize = maxsize
+      self.policy  = policy
+      self._shrink(maxsize)
+  def _shrink(self, size):
+    if size is None:
+      return
+    while len(self.entries) > size:
+      self.entries.popitem(last=False)
+      self.evictions += 1
+  def get(self, pattern, flags=0, sep=None, split_prefix=False):
+    '''
+    Returns the result of ``globre.compile(pattern, flags, sep,
+    split_prefix)``, re-using a previously compiled object if one is
+    available.
+    '''
+    profiler = _profiler
+    if profiler is not None:
+      started = _clock()
+    # (a bytearray is unhashable, and could change after being cached)
+    if isinstance(pattern, bytearray):
+      pattern = bytes(pattern)
+    if isinstance(sep, bytearray):
+      sep = bytes(sep)
+    key = (pattern, flags, sep, bool(split_prefix))
+    with self.lock:
+      try:
+        if self.policy == self.LRU:
+          ret = self.entries.pop(key)
+          self.entries[key] = ret
+        else:
+          ret = self.entries[key]
+        self.hits += 1
+      except KeyError:
+        self.misses += 1
+      else:
+        if profiler is not None:
+          profiler('cache_hit', pattern, _clock() - started)
+        return ret
+    ret = compile(pattern, flags=flags, sep=sep, split_prefix=split_prefix)
+    if self.maxsize != 0:
+      with self.lock:
+        self.entries[key] = ret
+        self._shrink(self.maxsize)
+    if profiler is not None:
+      profiler('cache_miss', pattern, _clock() - started)
+    return ret
+  def purge(self):
+    '''
+    Removes all compiled patterns from the cache. The hit, miss and
+    eviction counters are *not* reset.
+    '''
+    with self.lock:
+      self.entries.clear()
+  def stats(self):
+    '''
+    Returns a dict with the current cache statistics: the number of
+    ``hits``, ``misses`` and ``evictions``, the current ``size``, the
+    ``maxsize`` and the eviction ``policy``.
+    '''
+    with self.lock:
+      return dict(
+        hits      = self.hits,
+        misses    = self.misses,
+        evictions = self.evictions,
+        size      = len(self.entries),
+        maxsize   = self.maxsize,
+        policy    = self.policy,
+      )
+  def __len__(self):
+    return len(self.entries)
+
+cache = PatternCache()
+
+#------------------------------------------------------------------------------
+def purge():
+  '''
+  Clears the compiled pattern cache used by `globre.match` and
+  `globre.search` (the equivalent of `re.purge`).
+  '''
+  cache.purge()
+
+#------------------------------------------------------------------------------
+def set_profiler(profiler):
+  '''
+  Installs the callable `profiler` (or removes the current one if
+  ``None``), and returns the previously installed one. While it is
+  installed, it is called as ``profiler(phase, pattern, elapsed,
+  source=None)`` with the `elapsed` time in seconds of each of the
+  following phases of the glob `pattern`:
+
+  * ``tokenize``, ``translate`` and ``compile``: the phases of
+    `globre.compile` (see there). The regex `source` is given with
+    ``translate``.
+  * ``cache_hit`` and ``cache_miss``: a lookup in the pattern cache
+    used by `globre.match` and `globre.search` (including the compile
+    phases for a miss).
+  * ``match`` and ``search``: the matching done by `globre.match` and
+    `globre.search`, with the regex `source`.
+
+  The profiler may be called concurrently from several threads. See
+  `globre.Profiler` for a profiler that aggregates these calls.
+  '''
+  global _profiler
+  ret, _profiler = _profiler, profiler
+  return ret
+
+#------------------------------------------------------------------------------
+def _profiled(profiler, phase, pattern, compiled, string):
+  started = _clock()
+  ret = getattr(compiled, phase)(string)
+  profiler(phase, pattern, _clock() - started, compiled.pattern)
+  return ret
+
 #------------------------------------------------------------------------------
 def match(pattern, string, sep=None, flags=0):
   flags |= EXACT
-  return compile(pattern, sep=sep, flags=flags).match(string)
+  profiler = _profiler
+  if profiler is not None:
+    return _profiled(
+      profiler, 'match', pattern, cache.get(pattern, flags=flags, sep=sep), string)
+  return cache.get(pattern, flags=flags, sep=sep).match(string)
 
 #------------------------------------------------------------------------------
 def search(pattern, string, sep=None, flags=0):
   flags &= ~ EXACT
-  return compile(pattern, sep=sep, flags=flags).search(string)
+  profiler = _profiler
+  if profiler is not None:
+    return _profiled(
+      profiler, 'search', pattern, cache.get(pattern, flags=flags, sep=sep), string)
+  return cache.get(pattern, flags=flags, sep=sep).search(string)
+
+#------------------------------------------------------------------------------
+from . import engine
+from .globset import GlobSet, MutableGlobSet, compile_many
+from .analysis import subsumes, overlaps, minimize
+from .index import PrefixIndex
+from .bulk import filter, filter_many, mask, mask_many, scan_records
+from .walk import iglob
+from .keyrange import key_ranges, scan_keys, SortedKeys
+from .parallel import parallel_filter
+from . import persist
+from .instrument import Profiler
+if sys.version_info >= (3, 6):
+  from .aio import afilter
 
 #------------------------------------------------------------------------------
 # end of $Id$
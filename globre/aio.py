@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+#------------------------------------------------------------------------------
+# file: $Id$
+# auth: metagriffin <mg.github@uberdev.org>
+# date: 2026/10/18
+# copy: (C) Copyright 2013-EOT metagriffin -- see LICENSE.txt
+#------------------------------------------------------------------------------
+# This software is free software: you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This software is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see http://www.gnu.org/licenses/.
+#------------------------------------------------------------------------------
+
+'''
+Matching of asynchronously generated strings (e.g. the keys of a
+remote object store listing) with `asyncio`. This module requires
+Python 3.6 or better.
+'''
+
+import re
+import asyncio
+import collections
+import concurrent.futures
+
+from . import Tokenizer
+from .globset import GlobSet
+from .bulk import filter, filter_many
+
+# the matchers built by `_process_match` in executor processes, keyed
+# by their (patterns, sep, flags) specification
+_matchers = collections.OrderedDict()
+
+#------------------------------------------------------------------------------
+def _prefix(pattern):
+  if isinstance(pattern, (bytes, bytearray)):
+    return _prefix(bytes(pattern).decode('latin-1')).encode('latin-1')
+  tokens = Tokenizer(pattern).tokens(aslist=True)
+  # (inline regex can quantify or alternate the literal before it)
+  if any(token[0] == Tokenizer.REGEX for token in tokens):
+    return ''
+  if tokens and tokens[0][0] == Tokenizer.LITERAL:
+    return tokens[0][1]
+  return ''
+
+#------------------------------------------------------------------------------
+def prefix_hint(patterns, sep=None, flags=0):
+  '''
+  Returns the longest string that all strings matched by any of the
+  glob `patterns` (a glob, a list of globs or a `globre.GlobSet`)
+  start with, i.e. the prefix to request from a listing API so that it
+  only returns the keys that can possibly match. This is the common
+  prefix of the literal prefixes of the patterns (see the
+  `split_prefix` parameter of `globre.compile`), cut at the first
+  separator if `sep` has several characters (which literal separators
+  match interchangeably), and empty for ``re.IGNORECASE`` or if any
+  of the patterns contain inline regex (``{...}``).
+  '''
+  if isinstance(patterns, GlobSet):
+    patterns, sep, flags = patterns.patterns, patterns.sep, patterns.flags
+  elif isinstance(patterns, (str, bytes)):
+    patterns = [patterns]
+  if not patterns:
+    return ''
+  if flags & re.IGNORECASE:
+    return patterns[0][:0]
+  prefixes = [_prefix(pattern) for pattern in patterns]
+  ret = prefixes[0]
+  for prefix in prefixes[1:]:
+    while not prefix.startswith(ret):
+      ret = ret[:-1]
+  if sep and len(sep) > 1:
+    if isinstance(sep, (bytes, bytearray)):
+      sep = bytes(sep).decode('latin-1')
+    text = ret.decode('latin-1') if isinstance(ret, bytes) else ret
+    for pos, char in enumerate(text):
+      if char in sep:
+        return ret[:pos]
+  return ret
+
+#------------------------------------------------------------------------------
+def _spec_matcher(patterns, sep, flags):
+  if len(patterns) == 1:
+    pattern = patterns[0]
+    return lambda batch: list(filter(pattern, batch, sep=sep, flags=flags))
+  globset = GlobSet(patterns, sep=sep, flags=flags)
+  return lambda batch: list(filter_many(globset, batch))
+
+#------------------------------------------------------------------------------
+def _process_match(spec, batch):
+  # runs in the processes of a `concurrent.futures.ProcessPoolExecutor`,
+  # where the matcher is only built for the first batch of each spec
+  matcher = _matchers.pop(spec, None)
+  if matcher is None:
+    matcher = _spec_matcher(*spec)
+  _matchers[spec] = matcher
+  while len(_matchers) > 8:
+    _matchers.popitem(last=False)
+  return matcher(batch)
+
+#------------------------------------------------------------------------------
+async def _batches(iterator, batchsize):
+  batch = []
+  async for item in iterator:
+    batch.append(item)
+    if len(batch) >= batchsize:
+      yield batch
+      batch = []
+  if batch:
+    yield batch
+
+#------------------------------------------------------------------------------
+async def afilter(patterns, source, sep=None, flags=0, batchsize=1000,
+                  offload=1000, executor=None, maxpending=4):
+  '''
+  Asynchronously generates the strings of the asynchronous iterable
+  `source` that match the glob `patterns` (a glob, a list of globs or
+  a `globre.GlobSet`) in their entirety, in the order of `source`. If
+  `source` is callable, it is first called with the `prefix_hint` of
+  `patterns` and must return the asynchronous iterable, which allows
+  a listing API to only list the keys that can possibly match, e.g.:
+
+  .. code:: python
+
+    async for key in globre.afilter(
+        'logs/2024-*/**.gz', lambda prefix: bucket.list(prefix=prefix)):
+      ...
+
+  Strings are read and matched in batches of `batchsize`, and batches
+  of at least `offload` items (all of them if ``0``, none if
+  ``None``) are matched in `executor` (which defaults to the event
+  loop's default thread pool executor, and can also be a
+  `concurrent.futures.ProcessPoolExecutor`) so as not to block the
+  event loop. At most `maxpending` batches are read ahead of the
+  consumer, which bounds the memory used.
+  '''
+  if isinstance(patterns, GlobSet):
+    patterns, sep, flags = patterns.patterns, patterns.sep, patterns.flags
+  elif isinstance(patterns, (str, bytes)):
+    patterns = [patterns]
+  patterns = tuple(patterns)
+  if callable(source):
+    source = source(prefix_hint(patterns, sep=sep, flags=flags))
+  # (`get_running_loop` is new in Python 3.7)
+  loop    = getattr(asyncio, 'get_running_loop', asyncio.get_event_loop)()
+  matcher = _spec_matcher(patterns, sep, flags)
+  if isinstance(executor, concurrent.futures.ProcessPoolExecutor):
+    spec = (patterns, sep, flags)
+    def submit(batch):
+      return loop.run_in_executor(executor, _process_match, spec, batch)
+  else:
+    # (the automaton of a GlobSet can be stepped by several threads at
+    # once, so batches are matched concurrently)
+    def submit(batch):
+      return loop.run_in_executor(executor, matcher, batch)
+  pending = collections.deque()
+  batches = _batches(source, batchsize)
+  try:
+    while True:
+      async for batch in batches:
+        if offload is not None and len(batch) >= offload:
+          pending.append(submit(batch))
+        else:
+          pending.append(matcher(batch))
+        if len(pending) >= maxpending:
+          break
+      if not pending:
+        break
+      result = pending.popleft()
+      if not isinstance(result, list):
+        result = await result
+      for item in result:
+        yield item
+  finally:
+    for result in pending:
+      if not isinstance(result, list):
+        result.cancel()
+    await batches.aclose()
+
+#------------------------------------------------------------------------------
+# end of $Id$
+#------------------------------------------------------------------------------
@@ -0,0 +1,246 @@
+# -*- coding: utf-8 -*-
+#------------------------------------------------------------------------------
+# file: $Id$
+# auth: metagriffin <mg.github@uberdev.org>
+# date: 2026/10/18
+# copy: (C) Copyright 2013-EOT metagriffin -- see LICENSE.txt
+#------------------------------------------------------------------------------
+# This software is free software: you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This software is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see http://www.gnu.org/licenses/.
+#------------------------------------------------------------------------------
+
+'''
+Static analysis of the sets of strings matched by glob patterns.
+
+Patterns are translated into `globre.engine` programs and compared by
+exploring the product of their automata. Since only a few characters
+can behave differently from each other in any pair of programs, the
+alphabet is first partitioned into classes of characters that all
+program elements treat alike, and only one representative character
+of each class is stepped. This makes the results exact for all
+patterns that can be translated into a program; for the others (i.e.
+those with inline regex, ``{...}``), the results are conservative.
+
+As with `globre.match`, patterns are matched against strings in their
+entirety. Since paths do not normally contain newlines, which are
+matched differently by the wildcards (e.g. without ``re.DOTALL``,
+``*`` matches a newline but ``**`` does not), strings that contain
+newlines are only considered if the `newlines` parameter is truthy,
+in which case the regex rule that a trailing newline may be left
+unmatched is taken into account as well.
+'''
+
+import re
+import sys
+
+from . import GLOBFLAGS
+from . import engine
+
+try:
+  _chr = unichr
+except NameError:
+  _chr = chr
+
+# all the characters, used to find the characters a class matches
+_universe = None
+
+# (source, flags) => sorted list of (start, end) code point intervals
+_intervals = {}
+
+#------------------------------------------------------------------------------
+def _class_intervals(source, flags):
+  global _universe
+  key = (source, flags)
+  ret = _intervals.get(key)
+  if ret is None:
+    if _universe is None:
+      _universe = ''.join(map(_chr, range(sys.maxunicode + 1)))
+    ret = _intervals[key] = [
+      match.span() for match in re.finditer('(?:' + source + ')+', _universe, flags)]
+  return ret
+
+#------------------------------------------------------------------------------
+class _Glob(object):
+  # the program of a glob, along with what is needed to compare it
+  # with others: its automaton, the boundaries of the classes of
+  # characters that its elements distinguish, and the shortest string
+  # that it matches (or ``None`` if none is known)
+  __slots__ = ('prog', 'auto', 'bounds', 'witness')
+  def __init__(self, prog, flags, newlines):
+    flags = flags & ~ GLOBFLAGS
+    self.prog   = prog
+    self.auto   = engine.Automaton([prog], flags=flags)
+    self.bounds = set()
+    witness = []
+    for kind, value, loop in prog:
+      if kind == engine.CHAR:
+        spans = [(ord(value), ord(value) + 1)]
+      else:
+        spans = _class_intervals(value, flags)
+      char = None
+      for start, end in spans:
+        self.bounds.add(start)
+        self.bounds.add(end)
+        if char is None:
+          if newlines or not start <= ord('\n') < end:
+            char = _chr(start)
+          elif end - start > 1:
+            char = _chr(start + 1 if start == ord('\n') else start)
+      if not loop and witness is not None:
+        if char is None:
+          witness = None
+        else:
+          witness.append(char)
+    self.witness = None if witness is None else ''.join(witness)
+
+def _glob(pattern, sep, flags, newlines):
+  prog = engine.program(pattern, flags=flags, sep=sep)
+  if prog is None:
+    return None
+  return _Glob(prog, flags, newlines)
+
+#------------------------------------------------------------------------------
+def _search(globs, newlines, found, alive):
+  # explores the combinations of states reachable by the automata of
+  # `globs` on the same input, and returns ``True`` as soon as one
+  # accepts (a tuple of booleans, one per glob) in a way for which
+  # `found` returns truthy. Combinations where any of the automata
+  # with an index in `alive` is dead are not explored any further.
+  bounds = set([0, ord('\n'), ord('\n') + 1])
+  for glob in globs:
+    bounds |= glob.bounds
+  # one representative character of each class of characters that all
+  # the globs treat alike (with the newline always in a class of its own)
+  chars = [_chr(point) for point in sorted(bounds)
+           if point <= sys.maxunicode and ( newlines or point != ord('\n') )]
+  autos = [glob.auto for glob in globs]
+  # each node is a tuple of (state, newline) pairs, where `newline` is
+  # truthy if the previous state accepted and the last character was a
+  # newline, since the regex "$" also matches before a trailing newline
+  seen  = set()
+  stack = [tuple((auto.start, False) for auto in autos)]
+  while stack:
+    node = stack.pop()
+    key  = tuple((state.ids, newline) for state, newline in node)
+    if key in seen:
+      continue
+    seen.add(key)
+    if found(tuple(bool(state.accepts) or newline for state, newline in node)):
+      return True
+    if any(node[idx][0] is autos[idx].dead for idx in alive):
+      continue
+    for char in chars:
+      stack.append(tuple(
+        (auto.step(state, char), char == '\n' and bool(state.accepts))
+        for auto, (state, newline) in zip(autos, node)))
+  return False
+
+#------------------------------------------------------------------------------
+def _subsumes(globa, globb, newlines):
+  # whether all the strings matched by `globb` are matched by `globa`
+  if globb.witness is not None and not globa.auto.run(globb.witness):
+    # the quick way to tell that most pairs are unrelated
+    return False
+  return not _search(
+    [globa, globb], newlines, lambda accepts: accepts[1] and not accepts[0], (1,))
+
+#------------------------------------------------------------------------------
+def subsumes(a, b, sep=None, flags=0, newlines=False):
+  '''
+  Returns ``True`` if the glob `a` matches every string that the glob
+  `b` matches (i.e. `b` is redundant given `a`), for example
+  ``subsumes('logs/**', 'logs/*.txt')``. See `globre.compile` for
+  details on `sep` and `flags`, and the module documentation for
+  `newlines`.
+
+  If either pattern contains inline regex (``{...}``), the result is
+  conservative: it is only ``True`` if the patterns are identical.
+  '''
+  if a == b:
+    return True
+  globa = _glob(a, sep, flags, newlines)
+  globb = _glob(b, sep, flags, newlines)
+  if globa is None or globb is None:
+    return False
+  return _subsumes(globa, globb, newlines)
+
+#------------------------------------------------------------------------------
+def overlaps(a, b, sep=None, flags=0, newlines=False):
+  '''
+  Returns ``True`` if there is at least one string that both the globs
+  `a` and `b` match, for example ``overlaps('logs/*.txt', 'logs/a*')``.
+  See `globre.compile` for details on `sep` and `flags`, and the module
+  documentation for `newlines`.
+
+  If either pattern contains inline regex (``{...}``), the result is
+  conservative: it is always ``True``.
+  '''
+  globa = _glob(a, sep, flags, newlines)
+  globb = _glob(b, sep, flags, newlines)
+  if globa is None or globb is None:
+    return True
+  return _search(
+    [globa, globb], newlines,
+    lambda accepts: accepts[0] and accepts[1], (0, 1))
+
+#------------------------------------------------------------------------------
+def minimize(patterns, sep=None, flags=0, newlines=False):
+  '''
+  Returns the list of the glob `patterns` (in their original order)
+  without those that are subsumed by another pattern of the list (see
+  `subsumes`), i.e. a list of patterns that match exactly the same
+  strings as a whole (see the module documentation for `newlines`).
+  Of several equivalent patterns, only the first is kept.
+
+  Rather than comparing all pairs of patterns, a shortest string that
+  each pattern matches is matched against all the patterns at once
+  with a single `globre.engine.Automaton`, and only the patterns that
+  match it are candidates for subsuming it. Patterns with inline regex
+  (``{...}``) are only dropped if they are duplicates.
+  '''
+  patterns  = list(patterns)
+  globs     = [_glob(pattern, sep, flags, newlines) for pattern in patterns]
+  # (the witnesses share few transitions, so caching many states of this
+  # large automaton would only cost memory)
+  automaton = engine.Automaton(
+    [glob and glob.prog for glob in globs], flags=flags & ~ GLOBFLAGS,
+    maxstates=256)
+  first     = {}
+  ret       = []
+  for pos, pattern in enumerate(patterns):
+    if first.setdefault(pattern, pos) != pos:
+      continue
+    globb = globs[pos]
+    if globb is None:
+      ret.append(pattern)
+      continue
+    if globb.witness is None:
+      # matches nothing at all
+      candidates = range(len(patterns))
+    else:
+      candidates = automaton.run(globb.witness)
+    for other in candidates:
+      globa = globs[other]
+      if other == pos or globa is None or patterns[other] == pattern \
+          or not _subsumes(globa, globb, newlines):
+        continue
+      # of equivalent patterns, only keep the first one
+      if other < pos or not _subsumes(globb, globa, newlines):
+        break
+    else:
+      ret.append(pattern)
+  return ret
+
+#------------------------------------------------------------------------------
+# end of $Id$
+#------------------------------------------------------------------------------
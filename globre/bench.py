@@ -0,0 +1,303 @@
+# -*- coding: utf-8 -*-
+#------------------------------------------------------------------------------
+# file: $Id$
+# auth: metagriffin <mg.github@uberdev.org>
+# date: 2026/10/18
+# copy: (C) Copyright 2013-EOT metagriffin -- see LICENSE.txt
+#------------------------------------------------------------------------------
+# This software is free software: you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This software is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see http://www.gnu.org/licenses/.
+#------------------------------------------------------------------------------
+
+'''
+Benchmarks of the globre hot paths.
+
+Run with ``python -m globre.bench``, which prints a JSON document with
+one entry per benchmark, each reporting the number of operations per
+second and the percentiles of the time per operation (in seconds),
+measured over a number of repeated samples, along with the version of
+globre and a fingerprint of its code (see `globre.persist`). Use
+``--help`` for options, e.g. to select benchmarks or change the
+sampling.
+
+The ``patterns_*`` benchmarks match a different batch of distinct
+paths on every call; their ``_cold`` variants also discard the cached
+DFA states of the `globre.GlobSet` first, measuring the cost of
+building them.
+'''
+
+import sys, json, random, platform, argparse
+
+import globre
+from globre import persist
+
+#------------------------------------------------------------------------------
+def _names(count, seed=0):
+  rnd = random.Random(seed)
+  ret = []
+  for idx in range(count):
+    depth = rnd.randint(1, 6)
+    parts = ['d%d' % (rnd.randint(0, 20),) for _ in range(depth)]
+    ret.append('/' + '/'.join(parts) + '/file%d.%s' % (idx, rnd.choice(('txt', 'ini', 'log'))))
+  return ret
+
+#------------------------------------------------------------------------------
+def _patterns(count, seed=0):
+  rnd = random.Random(seed)
+  ret = []
+  for idx in range(count):
+    shape = rnd.randint(0, 3)
+    base  = '/d%d' % (rnd.randint(0, 20),)
+    if shape == 0:
+      ret.append(base + '/**.log')
+    elif shape == 1:
+      ret.append(base + '/*/file%d.*' % (rnd.randint(0, 999),))
+    elif shape == 2:
+      ret.append(base + '/d%d/*.[it][nx][it]' % (rnd.randint(0, 20),))
+    else:
+      ret.append('**/d%d/file?%d.txt' % (rnd.randint(0, 20), rnd.randint(0, 9)))
+  return ret
+
+#------------------------------------------------------------------------------
+# each benchmark is a function that returns a tuple of (ops, func):
+# calling `func()` performs `ops` operations.
+
+BENCHMARKS = []
+
+def benchmark(func):
+  BENCHMARKS.append(func)
+  return func
+
+@benchmark
+def tokenizer_long():
+  pattern = '/'.join('seg%d/*/**/file-??.[a-z]' % idx for idx in range(100))
+  return (1, lambda: list(globre.Tokenizer(pattern).tokens()))
+
+@benchmark
+def tokenizer_escaped():
+  pattern = ''.join('\\*\\?\\[x\\]{a\\}b}' for idx in range(200))
+  return (1, lambda: list(globre.Tokenizer(pattern).tokens()))
+
+@benchmark
+def compile_sep_single():
+  patterns = _patterns(100)
+  def run():
+    for pattern in patterns:
+      globre.compile(pattern, flags=globre.EXACT)
+  return (len(patterns), run)
+
+@benchmark
+def compile_sep_multi():
+  patterns = _patterns(100)
+  def run():
+    for pattern in patterns:
+      globre.compile(pattern, flags=globre.EXACT, sep='/\\')
+  return (len(patterns), run)
+
+def _match_bench(method, hits, pattern, flags=0):
+  # the names that `method` of the compiled `pattern` hits (or misses)
+  func  = getattr(globre.compile(pattern, flags=flags), method)
+  names = [name for name in _names(6000) if bool(func(name)) == hits][:1000]
+  def run():
+    for name in names:
+      func(name)
+  return (len(names), run)
+
+# "A**B" globs, which are matched with a `globre.FastPattern`
+@benchmark
+def match_hit():
+  return _match_bench('match', True, '/d**.log', globre.EXACT)
+
+@benchmark
+def match_miss():
+  return _match_bench('match', False, '/d**.log', globre.EXACT)
+
+@benchmark
+def search_fast_hit():
+  return _match_bench('search', True, 'd1**.log')
+
+@benchmark
+def search_fast_miss():
+  return _match_bench('search', False, 'd1**.log')
+
+# other globs, which are matched with a regex
+@benchmark
+def match_re_hit():
+  return _match_bench('match', True, '/d*/**.log', globre.EXACT)
+
+@benchmark
+def match_re_miss():
+  return _match_bench('match', False, '/d*/**.log', globre.EXACT)
+
+@benchmark
+def search_hit():
+  return _match_bench('search', True, 'd1?/*.log')
+
+@benchmark
+def search_miss():
+  return _match_bench('search', False, 'd1?/*.log')
+
+@benchmark
+def match_cached():
+  names = _names(1000)
+  def run():
+    for name in names:
+      globre.match('/d1/**.log', name)
+  return (len(names), run)
+
+# the number of distinct names that the scaling benchmarks draw from
+POOL = 100000
+
+_pool = []
+
+def _fresh(size):
+  # returns a function that returns the next `size` names of a pool of
+  # `POOL` distinct names on each call, so that successive calls match
+  # new paths instead of only hitting warm caches
+  if not _pool:
+    _pool.extend(_names(POOL, seed=1))
+  cursor = [0]
+  def fresh():
+    pos = cursor[0]
+    if pos + size > len(_pool):
+      pos = 0
+    cursor[0] = pos + size
+    return _pool[pos:pos + size]
+  return fresh
+
+def _scaling_bench(count, many, cold=False):
+  size     = 100
+  fresh    = _fresh(size)
+  patterns = _patterns(count)
+  if many:
+    gset = globre.GlobSet(patterns)
+    automata = [gset.main] + [entry[0] for entry in gset.buckets.values()]
+    def run():
+      if cold:
+        # discard the DFA states built for the previous paths
+        for automaton in automata:
+          automaton.flush()
+      for name in fresh():
+        gset.matches(name)
+  else:
+    exprs = [globre.compile(pattern, flags=globre.EXACT).match for pattern in patterns]
+    def run():
+      for name in fresh():
+        for expr in exprs:
+          expr(name)
+  return (size, run)
+
+for _count in (10, 100, 1000, 10000):
+  for _mode in ('loop', 'globset', 'globset_cold'):
+    def _bench(count=_count, mode=_mode):
+      return _scaling_bench(count, mode != 'loop', cold=mode.endswith('_cold'))
+    _bench.__name__ = 'patterns_%d_%s' % (_count, _mode)
+    benchmark(_bench)
+del _count, _mode, _bench
+
+@benchmark
+def filter_bulk():
+  names = _names(10000)
+  return (len(names), lambda: list(globre.filter('/d1/**.log', names)))
+
+#------------------------------------------------------------------------------
+def percentile(values, pct):
+  '''
+  Returns the `pct` percentile of the sorted list `values`, using
+  linear interpolation between the closest ranks.
+  '''
+  if not values:
+    return None
+  pos  = ( len(values) - 1 ) * pct / 100.0
+  low  = int(pos)
+  high = min(low + 1, len(values) - 1)
+  return values[low] + ( values[high] - values[low] ) * ( pos - low )
+
+#------------------------------------------------------------------------------
+def run(bench, samples=20, mintime=0.05):
+  '''
+  Runs the benchmark function `bench` and returns a dict of its
+  results. Each of the `samples` samples repeats the benchmark until
+  at least `mintime` seconds have elapsed.
+  '''
+  ops, func = bench()
+  # (`time.perf_counter` is not available in Python 2)
+  clock = globre._clock
+  func()
+  times = []
+  total = 0
+  for _ in range(samples):
+    count = 0
+    start = clock()
+    while True:
+      func()
+      count += 1
+      elapsed = clock() - start
+      if elapsed >= mintime:
+        break
+    times.append(elapsed / ( count * ops ))
+    total += count * ops
+  times.sort()
+  return dict(
+    name    = bench.__name__,
+    ops     = total,
+    samples = samples,
+    ops_per_sec = 1.0 / percentile(times, 50),
+    percentiles = dict(
+      ('p%d' % (pct,), percentile(times, pct)) for pct in (0, 50, 90, 99, 100)),
+  )
+
+#------------------------------------------------------------------------------
+def main(args=None):
+  parser = argparse.ArgumentParser(
+    prog='python -m globre.bench',
+    description='Runs the globre benchmarks and prints the results as JSON.')
+  parser.add_argument(
+    '-s', '--samples', type=int, default=20,
+    help='number of samples per benchmark (default: %(default)s)')
+  parser.add_argument(
+    '-t', '--min-time', type=float, default=0.05, metavar='SECONDS',
+    help='minimum duration of each sample (default: %(default)s)')
+  parser.add_argument(
+    '-l', '--list', action='store_true',
+    help='list the available benchmarks and exit')
+  parser.add_argument(
+    'names', metavar='NAME', nargs='*',
+    help='only run the benchmarks whose name starts with NAME')
+  options = parser.parse_args(args)
+  if options.list:
+    for bench in BENCHMARKS:
+      print(bench.__name__)
+    return 0
+  results = [
+    run(bench, samples=options.samples, mintime=options.min_time)
+    for bench in BENCHMARKS
+    if not options.names
+    or any(bench.__name__.startswith(name) for name in options.names)]
+  json.dump(dict(
+    python      = platform.python_version(),
+    platform    = platform.platform(),
+    globre      = persist._version(),
+    fingerprint = persist._fingerprint(),
+    benchmarks  = results,
+  ), sys.stdout, indent=2, sort_keys=True)
+  sys.stdout.write('\n')
+  return 0
+
+#------------------------------------------------------------------------------
+if __name__ == '__main__':
+  sys.exit(main())
+
+#------------------------------------------------------------------------------
+# end of $Id$
+#------------------------------------------------------------------------------
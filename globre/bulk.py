@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+#------------------------------------------------------------------------------
+# file: $Id$
+# auth: metagriffin <mg.github@uberdev.org>
+# date: 2026/10/18
+# copy: (C) Copyright 2013-EOT metagriffin -- see LICENSE.txt
+#------------------------------------------------------------------------------
+# This software is free software: you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This software is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see http://www.gnu.org/licenses/.
+#------------------------------------------------------------------------------
+
+'''
+Bulk matching of many strings against a glob (or a `globre.GlobSet`).
+
+All of these functions evaluate the items with C-level iteration
+(`filter` / `map`) over a single bound matching function, which
+avoids the per-item attribute lookups and call overhead of matching
+in a Python-level loop, except for `scan_records`, which matches the
+delimited records of a single (bytes) buffer in place.
+'''
+
+import re
+
+try:
+  from itertools import ifilter as _filter, imap as _map
+except ImportError:
+  _filter = filter
+  _map    = map
+
+from . import cache, EXACT, NormalizedPattern
+from .globset import GlobSet
+
+#------------------------------------------------------------------------------
+def _matcher(pattern, sep, flags):
+  if isinstance(pattern, tuple):
+    # the result of ``globre.compile(..., split_prefix=True)``
+    pattern = pattern[1]
+  if hasattr(pattern, 'match'):
+    return pattern.match
+  return cache.get(pattern, flags=flags | EXACT, sep=sep).match
+
+#------------------------------------------------------------------------------
+def _matcher_many(patterns, sep, flags):
+  if not isinstance(patterns, GlobSet):
+    patterns = GlobSet(patterns, sep=sep, flags=flags)
+  return patterns.any
+
+#------------------------------------------------------------------------------
+def _mask(match, items):
+  if type(items).__module__ == 'numpy' and hasattr(items, 'dtype'):
+    import numpy
+    flat = items.ravel()
+    return numpy.fromiter(
+      _map(bool, _map(match, flat)), dtype=bool, count=len(flat)
+    ).reshape(items.shape)
+  return list(_map(bool, _map(match, items)))
+
+#------------------------------------------------------------------------------
+def filter(pattern, iterable, sep=None, flags=0):
+  '''
+  Lazily generates the items of `iterable` that match the glob
+  `pattern` in their entirety (i.e. like `globre.match`). The
+  `pattern` can either be a glob string, in which case it is compiled
+  (and cached) with `sep` and `flags` plus ``globre.EXACT``, or an
+  object returned by `globre.compile`, in which case it is used as-is
+  and `sep` and `flags` are ignored.
+  '''
+  return _filter(_matcher(pattern, sep, flags), iterable)
+
+#------------------------------------------------------------------------------
+def filter_many(patterns, iterable, sep=None, flags=0):
+  '''
+  Lazily generates the items of `iterable` that match any of the
+  `patterns`, which can either be a `globre.GlobSet` or a sequence of
+  glob strings (which are compiled into a GlobSet with `sep` and
+  `flags`).
+  '''
+  return _filter(_matcher_many(patterns, sep, flags), iterable)
+
+#------------------------------------------------------------------------------
+def mask(pattern, items, sep=None, flags=0):
+  '''
+  Returns a boolean mask of which of the `items` match the glob
+  `pattern` (see `filter` for details on `pattern`, `sep` and
+  `flags`). If `items` is a NumPy array (of ``str_`` or ``object``
+  dtype), the mask is a NumPy boolean array of the same shape,
+  otherwise it is a list.
+  '''
+  return _mask(_matcher(pattern, sep, flags), items)
+
+#------------------------------------------------------------------------------
+def mask_many(patterns, items, sep=None, flags=0):
+  '''
+  Returns a boolean mask of which of the `items` match any of the
+  `patterns` (see `filter_many` for details on `patterns` and `mask`
+  for details on the return value).
+  '''
+  return _mask(_matcher_many(patterns, sep, flags), items)
+
+#------------------------------------------------------------------------------
+def scan_records(pattern, buffer, sep=None, flags=0, delimiter=b'\n',
+                 pos=0, endpos=None):
+  '''
+  Generates the ``(start, end)`` offsets of the records of `buffer`
+  that match the glob `pattern` in their entirety, where records are
+  separated by `delimiter` (typically ``b"\\n"`` or ``b"\\0"``), which
+  is not part of the record. The `buffer` can be any bytes-like object
+  that `re` supports, e.g. `bytes`, `bytearray`, `memoryview` or
+  `mmap`: the records are matched in place using the regex `pos` and
+  `endpos` parameters, i.e. they are never copied, and only the region
+  from `pos` to `endpos` of `buffer` is scanned.
+
+  The `pattern` can either be a bytes glob, which is compiled (and
+  cached) with `sep` and `flags`, or an object returned by
+  ``globre.compile`` for a bytes glob *without* the ``globre.EXACT``
+  flag (whose ``^`` would only match at the start of `buffer`), in
+  which case `sep` and `flags` are ignored. Each record is then
+  tested with the ``fullmatch`` method.
+
+  With the ``globre.NORMSEP`` flag (or a `globre.NormalizedPattern`),
+  the separators of the region from `pos` to `endpos` are normalized
+  once, in a copy of that region, in which the records are then
+  matched.
+  '''
+  if isinstance(pattern, tuple):
+    # the result of ``globre.compile(..., split_prefix=True)``
+    pattern = pattern[1]
+  if not hasattr(pattern, 'fullmatch'):
+    pattern = cache.get(pattern, flags=flags & ~ EXACT, sep=sep)
+  size = len(delimiter)
+  if endpos is None or endpos > len(buffer):
+    endpos = len(buffer)
+  if isinstance(pattern, NormalizedPattern):
+    # (normalizing the entire buffer for each record would make the
+    # scan quadratic, and is not supported by memoryview and mmap)
+    region = pattern.normalize(bytes(buffer[pos:endpos]))
+    offset = pos
+    match  = pattern.regex.fullmatch
+    def fullmatch(buffer, start, end):
+      return match(region, start - offset, end - offset)
+  else:
+    fullmatch = pattern.fullmatch
+  if hasattr(buffer, 'find'):
+    find = buffer.find
+  else:
+    # e.g. memoryview, which has no `find` method, but can be searched
+    # with a regex without copying it
+    search = re.compile(re.escape(delimiter)).search
+    def find(sub, start, end):
+      match = search(buffer, start, end)
+      return -1 if match is None else match.start()
+  while pos < endpos:
+    end = find(delimiter, pos, endpos)
+    if end < 0:
+      end = endpos
+    if fullmatch(buffer, pos, end):
+      yield (pos, end)
+    pos = end + size
+
+#------------------------------------------------------------------------------
+# end of $Id$
+#------------------------------------------------------------------------------
@@ -0,0 +1,396 @@
+# -*- coding: utf-8 -*-
+#------------------------------------------------------------------------------
+# file: $Id$
+# auth: metagriffin <mg.github@uberdev.org>
+# date: 2026/10/18
+# copy: (C) Copyright 2013-EOT metagriffin -- see LICENSE.txt
+#------------------------------------------------------------------------------
+# This software is free software: you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This software is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see http://www.gnu.org/licenses/.
+#------------------------------------------------------------------------------
+
+'''
+An automaton-based matching engine for glob patterns.
+
+Globs without inline regex (``{...}``) tokens translate into a linear
+"program" of single-character tests, some of which may repeat (``*``
+and ``**``). Any number of such programs can be combined into one
+`Automaton`, which is simulated as a lazily-built DFA: each distinct
+(state, character) transition is computed once, after which matching
+a string costs one dict lookup per character, regardless of how many
+programs were combined. The programs are merged into a trie, so that
+the NFA states of their common prefixes (e.g. a leading ``**``) are
+shared, which keeps the DFA states small even for many thousands of
+programs.
+
+A single program is also the basis of `LinearPattern`, the matcher
+used by ``globre.compile`` for the ``globre.LINEAR`` flag, which
+never backtracks.
+'''
+
+import re
+
+from . import Tokenizer, FastMatch, EXACT, GLOBFLAGS
+
+# program element kinds
+CHAR  = 0     # a literal character, compared with "=="
+CLASS = 1     # a regex that must match exactly one character
+
+#------------------------------------------------------------------------------
+def program(pattern, flags=0, sep=None):
+  '''
+  Translates the glob `pattern` into a program, i.e. a tuple of
+  ``(kind, value, loop)`` elements, where `kind` is either ``CHAR``
+  (`value` is the literal character) or ``CLASS`` (`value` is the
+  source of a regex that matches a single character), and `loop` is
+  truthy if the element may match zero or more times. Returns
+  ``None`` if `pattern` contains inline regex (``{...}``) tokens or
+  ranges (``[...]``) that contain an escaped ``]`` other than as their
+  first character, which cannot be represented. See `globre.compile`
+  for details on `flags` and `sep`.
+  '''
+  if sep is None:
+    sep = '/'
+  nosep = '[^' + re.escape(sep) + ']'
+  anysep = '[' + re.escape(sep) + ']' if len(sep) > 1 else None
+  fold = bool(flags & re.IGNORECASE)
+  ret = []
+  for token in Tokenizer(pattern).tokens():
+    if token[0] == Tokenizer.LITERAL:
+      for char in token[1]:
+        if anysep and char in sep:
+          ret.append((CLASS, anysep, False))
+        elif fold:
+          ret.append((CLASS, re.escape(char), False))
+        else:
+          ret.append((CHAR, char, False))
+    elif token[0] == Tokenizer.SINGLE:
+      ret.append((CLASS, nosep, False))
+    elif token[0] == Tokenizer.MULTIPLE:
+      ret.append((CLASS, nosep, True))
+    elif token[0] == Tokenizer.ANY:
+      ret.append((CLASS, '.', True))
+    elif token[0] == Tokenizer.RANGE:
+      # an (escaped) "]" anywhere but at the start would close the
+      # character class early, making it match more than one character
+      if ']' in token[1][2 if token[1].startswith('^') else 1:]:
+        return None
+      ret.append((CLASS, '[' + token[1] + ']', False))
+    elif token[0] == Tokenizer.REGEX:
+      return None
+    else:
+      raise ValueError('unexpected token %r from globre.Tokenizer for glob: %s'
+                       % (token, pattern))
+  return tuple(ret)
+
+#------------------------------------------------------------------------------
+class State(object):
+  '''
+  A DFA state, i.e. a set of NFA states (`ids`), along with the
+  indexes of the programs that accept in this state (`accepts`) and
+  the cache of transitions already computed out of it (`next`).
+  '''
+  __slots__ = ('ids', 'accepts', 'next', 'chars', 'classes')
+  def __init__(self, ids, accepts):
+    self.ids     = ids
+    self.accepts = accepts
+    self.next    = {}
+    self.chars   = None
+    self.classes = None
+
+#------------------------------------------------------------------------------
+class Automaton(object):
+  '''
+  Combines the `programs` (as returned by `program`) into a single
+  automaton that tests a string against all of them in one pass.
+  Entries in `programs` that are ``None`` are never matched. The
+  `maxstates` parameter bounds the number of cached DFA states, and
+  `maxids` the total number of NFA states that they hold; when either
+  is exceeded, the cache is flushed and rebuilt on demand.
+
+  The NFA states are the nodes of the trie of the programs: each has
+  a `kinds`, `values` and `loops` entry (those of a program element,
+  or ``None`` for the end of a program) and a `nexts` list of the
+  indexes of its child nodes.
+
+  Strings are matched in their entirety, with the same semantics as
+  ``globre.compile(pattern, flags=globre.EXACT).match(string)``.
+  Several threads may match strings at the same time (at worst, they
+  compute the same transition twice).
+  '''
+  def __init__(self, programs, flags=0, maxstates=10000, maxids=1000000):
+    if flags & re.MULTILINE:
+      raise ValueError('re.MULTILINE is not supported by globre.engine')
+    self.flags     = flags & ~ GLOBFLAGS
+    self.maxstates = maxstates
+    self.maxids    = maxids
+    self.kinds     = []
+    self.values    = []
+    self.loops     = []
+    self.nexts     = []
+    self.accepts   = {}
+    self.closures  = {}
+    self.tests     = {}
+    self.states    = {}
+    self.size      = 0
+    self.start     = None
+    self.dead      = None
+    # (parent node, element) => node
+    nodes  = {}
+    starts = []
+    for idx, prog in enumerate(programs):
+      if prog is None:
+        continue
+      parent = None
+      for element in tuple(prog) + ((None, None, False),):
+        sid = nodes.get((parent, element))
+        if sid is None:
+          sid = nodes[(parent, element)] = len(self.kinds)
+          self.kinds.append(element[0])
+          self.values.append(element[1])
+          self.loops.append(element[2])
+          self.nexts.append([])
+          if parent is None:
+            starts.append(sid)
+          else:
+            self.nexts[parent].append(sid)
+        parent = sid
+      self.accepts.setdefault(parent, []).append(idx)
+    ids = set()
+    for sid in starts:
+      ids.update(self._closure(sid))
+    self.start = self._state(frozenset(ids))
+    self.dead  = self._state(frozenset())
+  def _closure(self, sid):
+    # the nodes reachable from `sid` without consuming a character,
+    # i.e. `sid` and, if it may repeat zero times, those that follow it
+    ret = self.closures.get(sid)
+    if ret is None:
+      ret   = set()
+      stack = [sid]
+      while stack:
+        cur = stack.pop()
+        if cur in ret:
+          continue
+        ret.add(cur)
+        if self.loops[cur]:
+          stack.extend(self.nexts[cur])
+      ret = self.closures[sid] = tuple(ret)
+    return ret
+  def _state(self, ids):
+    state = self.states.get(ids)
+    if state is not None:
+      return state
+    if len(self.states) >= self.maxstates or self.size + len(ids) > self.maxids:
+      self.flush()
+    accepts = set()
+    for sid in ids:
+      if sid in self.accepts:
+        accepts.update(self.accepts[sid])
+    state = State(ids, tuple(sorted(accepts)))
+    self.states[ids] = state
+    self.size += len(ids)
+    return state
+  def flush(self):
+    '''
+    Discards all cached DFA states, except the start and dead states.
+    '''
+    for state in list(self.states.values()):
+      state.next.clear()
+    self.states = {}
+    self.size   = 0
+    for state in (self.start, self.dead):
+      if state is not None:
+        self.states[state.ids] = state
+        self.size += len(state.ids)
+  def _test(self, source):
+    test = self.tests.get(source)
+    if test is None:
+      test = self.tests[source] = re.compile(source, self.flags).match
+    return test
+  def _prepare(self, state):
+    chars   = {}
+    classes = {}
+    for sid in state.ids:
+      kind = self.kinds[sid]
+      if kind is None:
+        continue
+      targets = [sid] if self.loops[sid] else self.nexts[sid]
+      if kind == CHAR:
+        chars.setdefault(self.values[sid], []).extend(targets)
+      else:
+        classes.setdefault(self.values[sid], []).extend(targets)
+    # (`chars` is set last, since `step` only checks that one)
+    state.classes = [(self._test(src), targets) for src, targets in classes.items()]
+    state.chars   = chars
+  def step(self, state, char):
+    '''
+    Returns the state reached from `state` by consuming `char`.
+    '''
+    nxt = state.next.get(char)
+    if nxt is not None:
+      return nxt
+    if state.chars is None:
+      self._prepare(state)
+    ids     = set()
+    closure = self._closure
+    for target in state.chars.get(char, ()):
+      ids.update(closure(target))
+    for test, targets in state.classes:
+      if test(char):
+        for target in targets:
+          ids.update(closure(target))
+    nxt = self._state(frozenset(ids))
+    state.next[char] = nxt
+    return nxt
+  def _run(self, string):
+    state = self.start
+    dead  = self.dead
+    step  = self.step
+    for char in string:
+      state = state.next.get(char) or step(state, char)
+      if state is dead:
+        break
+    return state
+  def run(self, string):
+    '''
+    Returns a sorted tuple of the indexes of all programs that match
+    `string` in its entirety.
+    '''
+    if not string.endswith('\n'):
+      return self._run(string).accepts
+    # regex "$" also matches just before a trailing newline
+    state = self._run(string[:-1])
+    accepts = self.step(state, '\n').accepts
+    if not state.accepts:
+      return accepts
+    return tuple(sorted(set(accepts) | set(state.accepts)))
+
+#------------------------------------------------------------------------------
+class LinearPattern(object):
+  '''
+  A regex-compatible matcher for the glob `glob` that is guaranteed
+  to run in time linear in the length of the string (more precisely,
+  O(len(string) * len(glob)) in the worst case, and typically
+  O(len(string)) once the DFA states are cached), no matter how many
+  wildcards the glob contains. It is what ``globre.compile`` returns
+  for the ``globre.LINEAR`` flag; the `pattern` attribute is the
+  source of the equivalent regex, which is never compiled.
+
+  It implements the `match`, `search` and `fullmatch` methods, which
+  have the same results as those of the regex: the span of a match is
+  the leftmost and, for that start, shortest one, which is what the
+  non-greedy wildcards of the regex produce. All other regex methods
+  are deliberately not provided.
+
+  Globs that cannot be translated into a program (see `program`),
+  i.e. those that inline a regex (``{...}``) or have a range with an
+  escaped ``]`` other than as its first character, as well as the
+  ``re.MULTILINE`` flag, are rejected with a ValueError.
+  '''
+  groups     = 0
+  groupindex = {}
+  def __init__(self, glob, pattern, flags=0, sep=None):
+    prog = program(glob, flags=flags, sep=sep)
+    if prog is None:
+      raise ValueError(
+        'globre.LINEAR does not support inline regex ("{...}") or ranges'
+        ' with an escaped "]" in glob: %s' % (glob,))
+    self.glob     = glob
+    self.pattern  = pattern
+    self.flags    = flags & ~ GLOBFLAGS
+    self.exact    = bool(flags & EXACT)
+    self.forward  = Automaton([prog], flags=flags)
+    # the reversed program, preceded by a loop over any character:
+    # running it backwards over a string finds all the positions at
+    # which a match starts
+    self.backward = Automaton(
+      [((CLASS, '[\\s\\S]', True),) + tuple(reversed(prog))], flags=flags)
+  def __repr__(self):
+    return 'globre.LinearPattern(%r)' % (self.glob,)
+  def _bounds(self, string, pos, endpos):
+    if not isinstance(string, str):
+      raise TypeError('expected string, got %r' % (type(string).__name__,))
+    size = len(string)
+    if endpos is not None and endpos < size:
+      size = max(endpos, 0)
+      string = string[:size]
+    return (string, min(max(pos, 0), size), size)
+  def _shortest(self, string, pos, end):
+    # returns the end of the shortest match starting at `pos`, or -1
+    automaton = self.forward
+    state = automaton.start
+    if state.accepts:
+      return pos
+    dead  = automaton.dead
+    step  = automaton.step
+    while pos < end:
+      char  = string[pos]
+      pos  += 1
+      state = state.next.get(char) or step(state, char)
+      if state.accepts:
+        return pos
+      if state is dead:
+        break
+    return -1
+  def _exact(self, string, pos, end):
+    # returns the end of the match of the entire `string` (which, as
+    # with the regex "$", may exclude a trailing newline), or -1
+    if pos:
+      return -1
+    if string.endswith('\n'):
+      state = self.forward._run(string[:-1])
+      if state.accepts:
+        return end - 1
+      state = self.forward.step(state, '\n')
+    else:
+      state = self.forward._run(string)
+    return end if state.accepts else -1
+  def match(self, string, pos=0, endpos=None):
+    string, pos, end = self._bounds(string, pos, endpos)
+    if self.exact:
+      stop = self._exact(string, pos, end)
+    else:
+      stop = self._shortest(string, pos, end)
+    if stop < 0:
+      return None
+    return tuple.__new__(FastMatch, (self, string, pos, stop))
+  def search(self, string, pos=0, endpos=None):
+    if self.exact:
+      return self.match(string, pos, endpos)
+    string, pos, end = self._bounds(string, pos, endpos)
+    automaton = self.backward
+    state = automaton.start
+    step  = automaton.step
+    start = end if state.accepts else -1
+    idx   = end
+    while idx > pos:
+      idx  -= 1
+      char  = string[idx]
+      state = state.next.get(char) or step(state, char)
+      if state.accepts:
+        start = idx
+    if start < 0:
+      return None
+    return tuple.__new__(FastMatch, (self, string, start, self._shortest(string, start, end)))
+  def fullmatch(self, string, pos=0, endpos=None):
+    string, pos, end = self._bounds(string, pos, endpos)
+    if self.exact and pos:
+      return None
+    if not self.forward._run(string[pos:] if pos else string).accepts:
+      return None
+    return tuple.__new__(FastMatch, (self, string, pos, end))
+
+#------------------------------------------------------------------------------
+# end of $Id$
+#------------------------------------------------------------------------------
@@ -0,0 +1,344 @@
+# -*- coding: utf-8 -*-
+#------------------------------------------------------------------------------
+# file: $Id$
+# auth: metagriffin <mg.github@uberdev.org>
+# date: 2026/10/18
+# copy: (C) Copyright 2013-EOT metagriffin -- see LICENSE.txt
+#------------------------------------------------------------------------------
+# This software is free software: you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This software is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see http://www.gnu.org/licenses/.
+#------------------------------------------------------------------------------
+
+import re
+import threading
+
+from . import compile, EXACT, GLOBFLAGS
+from . import engine
+
+# the maximum length of the suffix keys of `GlobSet.buckets`
+SUFFIX = 4
+
+#------------------------------------------------------------------------------
+def _suffix(prog):
+  # returns the key of the `GlobSet` suffix bucket of the program
+  # `prog`, i.e. the last `SUFFIX` characters of its literal suffix if
+  # it starts with a wildcard, otherwise ``None``
+  if not prog or not prog[0][2]:
+    return None
+  ret = []
+  for kind, value, loop in reversed(prog):
+    if kind != engine.CHAR or loop or len(ret) >= SUFFIX:
+      break
+    ret.append(value)
+  return ''.join(reversed(ret)) or None
+
+#------------------------------------------------------------------------------
+class GlobSet(object):
+  '''
+  A set of glob patterns that are matched against a string in a
+  single pass. All of the `patterns` share the same `sep` and `flags`
+  (see `globre.compile` for details), and are always matched against
+  the entire string, i.e. with the same semantics as `globre.match`.
+
+  Patterns are combined into a `globre.engine.Automaton`, so the work
+  per string scales with the length of the string, not with the
+  number of patterns. Patterns that start with a wildcard (e.g.
+  ``**.log``), which would otherwise stay active over the entire
+  string, and that end with a literal suffix are set apart in smaller
+  automata keyed on the last few characters of that suffix, which are
+  only run for strings that end with them. The exception are patterns
+  that inline regular expressions (``{...}``): these cannot be
+  combined and are matched one after the other with their compiled
+  regex.
+
+  The `programs` and `regexes` parameters allow creating a GlobSet
+  from previously translated patterns (see `globre.persist`) without
+  re-tokenizing them: `programs` is the list of their
+  `globre.engine.program` translations and `regexes` the list of
+  their regex sources (only used for those whose program is ``None``).
+  '''
+  def __init__(self, patterns, sep=None, flags=0, programs=None, regexes=None):
+    self.patterns  = list(patterns)
+    self.sep       = sep
+    self.flags     = flags | EXACT
+    if programs is None:
+      programs = [engine.program(pattern, flags=self.flags, sep=sep)
+                  for pattern in self.patterns]
+    self.programs  = programs
+    self._automaton = None
+    # suffix => (automaton, indexes of its patterns)
+    self.buckets   = {}
+    main = list(programs)
+    members = {}
+    for idx, prog in enumerate(programs):
+      suffix = _suffix(prog)
+      if suffix:
+        members.setdefault(suffix, []).append(idx)
+        main[idx] = None
+    for suffix, idxs in members.items():
+      self.buckets[suffix] = (
+        engine.Automaton([programs[idx] for idx in idxs], flags=self.flags),
+        idxs)
+    self.suffixes  = sorted(set(len(suffix) for suffix in self.buckets))
+    self.main      = engine.Automaton(main, flags=self.flags)
+    self.fallback  = []
+    for idx, pattern in enumerate(self.patterns):
+      if programs[idx] is not None:
+        continue
+      if regexes is not None:
+        expr = re.compile(regexes[idx], self.flags & ~ GLOBFLAGS)
+      else:
+        expr = compile(pattern, flags=self.flags, sep=sep)
+      self.fallback.append((idx, expr.match))
+  def __len__(self):
+    return len(self.patterns)
+  @property
+  def automaton(self):
+    '''
+    The `globre.engine.Automaton` of all the patterns (built on first
+    use), for stepping through a string incrementally (see
+    `globre.iglob`).
+    '''
+    if self._automaton is None:
+      self._automaton = engine.Automaton(self.programs, flags=self.flags)
+    return self._automaton
+  def _run(self, string):
+    ret = self.main.run(string)
+    if not self.buckets:
+      return ret
+    # (regex "$" also matches just before a trailing newline)
+    texts = (string, string[:-1]) if string.endswith('\n') else (string,)
+    seen  = set()
+    extra = []
+    for size in self.suffixes:
+      for text in texts:
+        suffix = text[-size:]
+        if suffix in seen or suffix not in self.buckets:
+          continue
+        seen.add(suffix)
+        automaton, idxs = self.buckets[suffix]
+        extra.extend(idxs[idx] for idx in automaton.run(string))
+    if not extra:
+      return ret
+    return tuple(sorted(set(ret).union(extra)))
+  def matches(self, string):
+    '''
+    Returns a sorted list of the indexes of all the patterns that
+    match `string`.
+    '''
+    ret = self._run(string)
+    if self.fallback:
+      extra = [idx for idx, match in self.fallback if match(string)]
+      if extra:
+        return sorted(set(ret).union(extra))
+    return list(ret)
+  def any(self, string):
+    '''
+    Returns ``True`` if any of the patterns match `string`.
+    '''
+    if self._run(string):
+      return True
+    for idx, match in self.fallback:
+      if match(string):
+        return True
+    return False
+  def first(self, string):
+    '''
+    Returns the index of the first pattern that matches `string`, or
+    ``None`` if none match.
+    '''
+    ret = self._run(string)
+    ret = ret[0] if ret else None
+    for idx, match in self.fallback:
+      if ret is not None and idx > ret:
+        break
+      if match(string):
+        return idx
+    return ret
+
+#------------------------------------------------------------------------------
+class Segment(object):
+  '''
+  An immutable part of a `MutableGlobSet`: a `GlobSet` (`globset`),
+  the ids of its patterns (`ids`), and the set of indexes of the
+  patterns that have since been removed (`dead`).
+  '''
+  __slots__ = ('globset', 'ids', 'dead')
+  def __init__(self, globset, ids, dead=frozenset()):
+    self.globset = globset
+    self.ids     = ids
+    self.dead    = dead
+  def __len__(self):
+    return len(self.ids) - len(self.dead)
+  def live(self):
+    '''
+    Generates the ``(id, pattern, program)`` of the live patterns.
+    '''
+    globset = self.globset
+    for idx, ident in enumerate(self.ids):
+      if idx not in self.dead:
+        yield (ident, globset.patterns[idx], globset.programs[idx])
+  def matches(self, string):
+    ids, dead = self.ids, self.dead
+    return [ids[idx] for idx in self.globset.matches(string) if idx not in dead]
+
+#------------------------------------------------------------------------------
+class Snapshot(object):
+  '''
+  An immutable view of the patterns of a `MutableGlobSet` at one point
+  in time, as returned by `MutableGlobSet.snapshot`.
+  '''
+  __slots__ = ('segments',)
+  def __init__(self, segments):
+    self.segments = segments
+  def __len__(self):
+    return sum(len(segment) for segment in self.segments)
+  def matches(self, string):
+    '''
+    Returns the list of the ids of all the patterns that match
+    `string`, in the order that they were added.
+    '''
+    ret = []
+    for segment in self.segments:
+      ret.extend(segment.matches(string))
+    return ret
+  def any(self, string):
+    '''
+    Returns ``True`` if any of the patterns match `string`.
+    '''
+    for segment in self.segments:
+      if segment.matches(string):
+        return True
+    return False
+
+#------------------------------------------------------------------------------
+class MutableGlobSet(object):
+  '''
+  A set of glob patterns, like `GlobSet`, that supports adding and
+  removing patterns (identified by an arbitrary hashable id) without
+  recompiling all of them. See `globre.compile` for details on `sep`
+  and `flags`.
+
+  The patterns are stored in a few immutable segments (see `Segment`)
+  of exponentially decreasing size, each with its own `GlobSet`: a new
+  pattern gets a segment of its own, which is then merged with the
+  previous segments of similar size (merging reuses the translated
+  programs of the patterns), so that each pattern is re-combined only
+  a logarithmic number of times. Removing a pattern only marks it as
+  dead in its segment, which is compacted as soon as half of its
+  patterns are dead, so that their memory is reclaimed.
+
+  Updates are serialized with a lock, and replace the current
+  `Snapshot` (a tuple of segments) with a new one. Matching reads the
+  current snapshot without any locking, so that readers on other
+  threads always see a consistent set of patterns, either before or
+  after an update.
+  '''
+  def __init__(self, patterns=None, sep=None, flags=0):
+    self.sep       = sep
+    self.flags     = flags | EXACT
+    self._lock     = threading.Lock()
+    self._snapshot = Snapshot(())
+    # id => the GlobSet of the segment that contains it (segments are
+    # replaced when patterns are removed, but keep their GlobSet)
+    self._where    = {}
+    for pattern in patterns or ():
+      self.add(pattern)
+  def __len__(self):
+    return len(self._where)
+  def __contains__(self, ident):
+    return ident in self._where
+  def snapshot(self):
+    '''
+    Returns the current `Snapshot`, which is unaffected by subsequent
+    updates, e.g. to match several strings against the same patterns.
+    '''
+    return self._snapshot
+  def matches(self, string):
+    '''
+    Returns the list of the ids of all the patterns that match
+    `string`, in the order that they were added.
+    '''
+    return self._snapshot.matches(string)
+  def any(self, string):
+    '''
+    Returns ``True`` if any of the patterns match `string`.
+    '''
+    return self._snapshot.any(string)
+  def add(self, pattern, id=None):
+    '''
+    Adds the glob `pattern` with the id `id` (which defaults to
+    `pattern` itself), replacing any pattern with the same id.
+    '''
+    ident = pattern if id is None else id
+    with self._lock:
+      segments = list(self._snapshot.segments)
+      if ident in self._where:
+        self._remove(segments, ident)
+      segments.append(self._segment([(ident, pattern, None)]))
+      # merge the segments of similar size, so that there are only a
+      # logarithmic number of them
+      while len(segments) > 1 and len(segments[-2]) <= len(segments[-1]) * 2:
+        last = segments.pop()
+        prev = segments.pop()
+        segments.append(self._segment(list(prev.live()) + list(last.live())))
+      self._snapshot = Snapshot(tuple(segments))
+  def remove(self, id):
+    '''
+    Removes the pattern with the id `id`, raising KeyError if there is
+    none.
+    '''
+    with self._lock:
+      segments = list(self._snapshot.segments)
+      self._remove(segments, id)
+      self._snapshot = Snapshot(tuple(segments))
+  def _remove(self, segments, ident):
+    globset = self._where.pop(ident)
+    for pos, segment in enumerate(segments):
+      if segment.globset is globset:
+        break
+    dead = segment.dead | frozenset([segment.ids.index(ident)])
+    if len(dead) * 2 < len(segment.ids):
+      segments[pos] = Segment(globset, segment.ids, dead)
+      return
+    segment = Segment(globset, segment.ids, dead)
+    if len(segment):
+      segments[pos] = self._segment(list(segment.live()))
+    else:
+      del segments[pos]
+  def _segment(self, entries):
+    # creates a new segment for the list of (id, pattern, program)
+    ids      = tuple(entry[0] for entry in entries)
+    patterns = [entry[1] for entry in entries]
+    programs = [entry[2] for entry in entries]
+    if any(prog is None for prog in programs):
+      # (only new patterns and those with inline regex have no program,
+      # and re-translating the latter is cheap)
+      programs = [
+        engine.program(pattern, flags=self.flags, sep=self.sep) if prog is None else prog
+        for pattern, prog in zip(patterns, programs)]
+    globset = GlobSet(patterns, sep=self.sep, flags=self.flags, programs=programs)
+    for ident in ids:
+      self._where[ident] = globset
+    return Segment(globset, ids)
+
+#------------------------------------------------------------------------------
+def compile_many(patterns, sep=None, flags=0):
+  '''
+  Compiles the list of glob `patterns` into a `globre.GlobSet`.
+  '''
+  return GlobSet(patterns, sep=sep, flags=flags)
+
+#------------------------------------------------------------------------------
+# end of $Id$
+#------------------------------------------------------------------------------
@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+#------------------------------------------------------------------------------
+# file: $Id$
+# auth: metagriffin <mg.github@uberdev.org>
+# date: 2026/10/18
+# copy: (C) Copyright 2013-EOT metagriffin -- see LICENSE.txt
+#------------------------------------------------------------------------------
+# This software is free software: you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This software is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see http://www.gnu.org/licenses/.
+#------------------------------------------------------------------------------
+
+import re
+
+from . import Tokenizer, CompiledGlob, EXACT
+
+# the trie key under which a node stores its entries (never a character)
+ENTRIES = None
+
+#------------------------------------------------------------------------------
+class PrefixIndex(object):
+  '''
+  An index of glob patterns, stored in a trie keyed on the literal
+  prefix of each pattern (as returned by ``globre.compile(...,
+  split_prefix=True)``). Matching a string only runs the regexes of
+  the patterns whose prefix is a prefix of the string, so that with
+  large rule tables most patterns never reach the regex engine.
+
+  Patterns are matched in their entirety, like `globre.match`. See
+  `globre.compile` for details on `sep` and `flags`; note that with
+  ``re.IGNORECASE``, prefixes are compared in lower case. Patterns
+  with inline regex (``{...}``), which can quantify or alternate their
+  literal prefix, are indexed under the empty prefix, i.e. they are
+  candidates for every string.
+  '''
+  def __init__(self, patterns=None, sep=None, flags=0):
+    self.sep   = sep or '/'
+    self.flags = flags | EXACT
+    self.root  = {}
+    self.count = 0
+    self._norm = None
+    if len(self.sep) > 1:
+      self._norm = dict((ord(char), self.sep[0]) for char in self.sep[1:])
+    for pattern in patterns or ():
+      self.add(pattern)
+  def __len__(self):
+    return self.count
+  def _key(self, text):
+    if self._norm:
+      text = text.translate(self._norm)
+    if self.flags & re.IGNORECASE:
+      text = text.lower()
+    return text
+  def add(self, pattern, value=None):
+    '''
+    Adds the glob `pattern` to the index. The `value` (which defaults
+    to `pattern`) is what gets returned by `match` if the pattern
+    matches.
+    '''
+    # the regex is only compiled once a string reaches the pattern
+    glob   = CompiledGlob(pattern, sep=self.sep, flags=self.flags)
+    prefix = glob.prefix
+    if glob.has(Tokenizer.REGEX):
+      prefix = prefix[:0]
+    self.insert(prefix, pattern, glob.match, value=value)
+  def insert(self, prefix, pattern, match, value=None):
+    '''
+    Low-level version of `add` that adds the glob `pattern` to the
+    index with an already extracted literal `prefix` and a `match`
+    callable that returns truthy if a string matches `pattern` in its
+    entirety.
+    '''
+    node = self.root
+    for char in self._key(prefix):
+      node = node.setdefault(char, {})
+    node.setdefault(ENTRIES, []).append(
+      (self.count, prefix, pattern, match,
+       pattern if value is None else value))
+    self.count += 1
+  def candidates(self, string):
+    '''
+    Generates the ``(prefix, pattern)`` tuples of all indexed patterns
+    whose literal prefix is a prefix of `string`, i.e. the only
+    patterns that can possibly match it.
+    '''
+    for entry in self._candidates(string):
+      yield (entry[1], entry[2])
+  def _candidates(self, string):
+    node = self.root
+    for entry in node.get(ENTRIES, ()):
+      yield entry
+    for char in self._key(string):
+      node = node.get(char)
+      if node is None:
+        return
+      for entry in node.get(ENTRIES, ()):
+        yield entry
+  def match(self, string):
+    '''
+    Returns the values of all indexed patterns that match `string`,
+    in the order that they were added.
+    '''
+    return [entry[4] for entry in sorted(
+      entry for entry in self._candidates(string) if entry[3](string))]
+  def under(self, directory):
+    '''
+    Returns a sorted list of the distinct indexed prefixes that lie
+    under `directory`, i.e. that start with `directory` followed by
+    a separator. (Patterns with shorter prefixes that may also match
+    paths under `directory` are returned by ``candidates(directory)``.)
+    '''
+    key = self._key(directory)
+    if not key.endswith(self.sep[0]):
+      key += self.sep[0]
+    node = self.root
+    for char in key:
+      node = node.get(char)
+      if node is None:
+        return []
+    ret = set()
+    stack = [node]
+    while stack:
+      node = stack.pop()
+      for char, child in node.items():
+        if char is ENTRIES:
+          ret.update(entry[1] for entry in child)
+        else:
+          stack.append(child)
+    return sorted(ret)
+
+#------------------------------------------------------------------------------
+# end of $Id$
+#------------------------------------------------------------------------------
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+#------------------------------------------------------------------------------
+# file: $Id$
+# auth: metagriffin <mg.github@uberdev.org>
+# date: 2026/10/18
+# copy: (C) Copyright 2013-EOT metagriffin -- see LICENSE.txt
+#------------------------------------------------------------------------------
+# This software is free software: you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This software is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see http://www.gnu.org/licenses/.
+#------------------------------------------------------------------------------
+
+
+'''
+Opt-in instrumentation of the compile and match hot paths. While a
+profiler is installed with `globre.set_profiler`, `globre.compile`,
+the pattern cache and `globre.match` and `globre.search` report each
+of their phases to it; otherwise, they only pay for one global lookup.
+'''
+
+import threading
+
+from . import set_profiler
+
+#------------------------------------------------------------------------------
+class Profiler(object):
+  '''
+  A profiler callback (see `globre.set_profiler`) that aggregates the
+  count and timings of each phase, the pattern cache hit rate and the
+  `slowest` patterns (by their slowest phase, along with their regex
+  source), which `stats` returns as a plain dict, e.g. for a metrics
+  system. It is thread-safe, and is also a context manager that
+  installs itself for the duration of a ``with`` block:
+
+  .. code:: python
+
+    with globre.Profiler() as profiler:
+      handle_requests()
+    report(profiler.stats())
+  '''
+  def __init__(self, slowest=10):
+    self.lock     = threading.Lock()
+    self.slowest  = slowest
+    self.previous = None
+    self.reset()
+  def reset(self):
+    '''
+    Discards all the data collected so far.
+    '''
+    with self.lock:
+      # phase => [count, total, max]
+      self.phases = {}
+      # pattern => [elapsed, phase, source] of its slowest phase
+      self.worst  = {}
+  def __call__(self, phase, pattern, elapsed, source=None):
+    with self.lock:
+      entry = self.phases.get(phase)
+      if entry is None:
+        self.phases[phase] = [1, elapsed, elapsed]
+      else:
+        entry[0] += 1
+        entry[1] += elapsed
+        if elapsed > entry[2]:
+          entry[2] = elapsed
+      if not self.slowest:
+        return
+      worst = self.worst.get(pattern)
+      if worst is None:
+        self.worst[pattern] = [elapsed, phase, source]
+        # only the slowest patterns are kept, but trimming in bulk is
+        # much cheaper than on every call
+        if len(self.worst) > self.slowest * 4:
+          self.worst = dict(self._slowest())
+        return
+      if source is not None:
+        worst[2] = source
+      if elapsed > worst[0]:
+        worst[0] = elapsed
+        worst[1] = phase
+  def _slowest(self):
+    return sorted(
+      self.worst.items(), key=lambda item: item[1][0], reverse=True)[:self.slowest]
+  def stats(self):
+    '''
+    Returns a dict of the collected data, with the keys:
+
+    * ``phases``: a dict of phase name => dict of the ``count``,
+      ``total``, ``mean`` and ``max`` time (in seconds) of the phase.
+    * ``cache``: a dict of the pattern cache ``hits``, ``misses`` and
+      ``hit_rate`` (``None`` if the cache was not used).
+    * ``slowest``: a list of dicts of the ``pattern``, its regex
+      ``source`` (if known) and its slowest ``phase`` and its
+      ``elapsed`` time, slowest first.
+    '''
+    with self.lock:
+      phases = dict(
+        (phase, dict(count=count, total=total, mean=total / count, max=peak))
+        for phase, (count, total, peak) in self.phases.items())
+      hits   = self.phases.get('cache_hit', (0,))[0]
+      misses = self.phases.get('cache_miss', (0,))[0]
+      return dict(
+        phases  = phases,
+        cache   = dict(
+          hits     = hits,
+          misses   = misses,
+          hit_rate = float(hits) / ( hits + misses ) if hits + misses else None,
+        ),
+        slowest = [
+          dict(pattern=pattern, source=source, phase=phase, elapsed=elapsed)
+          for pattern, (elapsed, phase, source) in self._slowest()],
+      )
+  def __enter__(self):
+    self.previous = set_profiler(self)
+    return self
+  def __exit__(self, *args):
+    set_profiler(self.previous)
+    self.previous = None
+
+#------------------------------------------------------------------------------
+# end of $Id$
+#------------------------------------------------------------------------------
@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+#------------------------------------------------------------------------------
+# file: $Id$
+# auth: metagriffin <mg.github@uberdev.org>
+# date: 2026/10/18
+# copy: (C) Copyright 2013-EOT metagriffin -- see LICENSE.txt
+#------------------------------------------------------------------------------
+# This software is free software: you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This software is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see http://www.gnu.org/licenses/.
+#------------------------------------------------------------------------------
+
+
+'''
+Matching of a glob against a sorted key space (e.g. the keys of an
+LMDB or SQLite table, or a sorted list) with targeted range scans
+instead of a full scan.
+
+The ranges are derived from the tokens of the glob: as long as each
+token can only match a few characters (literals, and small ``[...]``
+ranges), the possible key prefixes are expanded; the first token that
+cannot be expanded (a large range, ``?``, ``*`` or ``**``) then bounds
+the range of keys that start with each prefix. Globs with inline
+regex (``{...}``), which can also quantify or alternate the tokens
+before it, are not analyzed and yield the range of all keys.
+'''
+
+import re
+import sys
+import bisect
+
+from . import Tokenizer, compile, EXACT, GLOBFLAGS
+from .analysis import _chr, _class_intervals
+
+#------------------------------------------------------------------------------
+def _successor(prefix, top):
+  # the smallest string that is greater than all the strings that start
+  # with `prefix` (whose characters are at most `top`), or ``None``
+  while prefix:
+    last = ord(prefix[-1])
+    if last < top:
+      return prefix[:-1] + _chr(last + 1)
+    prefix = prefix[:-1]
+  return None
+
+#------------------------------------------------------------------------------
+def key_ranges(pattern, sep=None, flags=0, maxranges=64):
+  '''
+  Returns a sorted list of non-overlapping ``(start, end)`` ranges of
+  keys that contain all the keys that the glob `pattern` matches in
+  their entirety (as with `globre.match`), where `start` is inclusive
+  and `end` is exclusive (or ``None`` if unbounded). For example,
+  ``key_ranges('logs/202[34]-*')`` returns ``[('logs/2023-',
+  'logs/2023.'), ('logs/2024-', 'logs/2024.')]``. See `globre.compile`
+  for details on `sep` and `flags`; bytes globs yield bytes ranges.
+
+  Key prefixes are expanded into at most `maxranges` alternatives,
+  after which the ranges become wider (but fewer). If `pattern`
+  contains inline regex (``{...}``), the single range of all keys is
+  returned.
+  '''
+  asbytes = isinstance(pattern, (bytes, bytearray))
+  if asbytes:
+    pattern = bytes(pattern).decode('latin-1')
+  tokens = Tokenizer(pattern).tokens(aslist=True)
+  if any(token[0] == Tokenizer.REGEX for token in tokens):
+    return [(b'' if asbytes else '', None)]
+  if isinstance(sep, (bytes, bytearray)):
+    sep = bytes(sep).decode('latin-1')
+  sep   = sep or '/'
+  flags = flags & ~ GLOBFLAGS
+  top   = 0xff if asbytes else sys.maxunicode
+  nosep = '[^' + re.escape(sep) + ']'
+  anysep = [(ord(char), ord(char) + 1) for char in sep] if len(sep) > 1 else None
+  prefixes = ['']
+  ranges   = None
+  for token in tokens:
+    if token[0] == Tokenizer.LITERAL:
+      alternatives = []
+      for char in token[1]:
+        if anysep and char in sep:
+          # literal separators match any of the separators
+          alternatives.append(anysep)
+        elif flags & re.IGNORECASE:
+          alternatives.append(_class_intervals(re.escape(char), flags))
+        else:
+          alternatives.append(char)
+    elif token[0] == Tokenizer.SINGLE:
+      alternatives = [_class_intervals(nosep, flags)]
+    elif token[0] == Tokenizer.RANGE:
+      alternatives = [_class_intervals('[' + token[1] + ']', flags)]
+    else:
+      ranges = [(prefix, _successor(prefix, top)) for prefix in prefixes]
+      break
+    for intervals in alternatives:
+      if not isinstance(intervals, list):
+        prefixes = [prefix + intervals for prefix in prefixes]
+        continue
+      intervals = [(start, min(end, top + 1)) for start, end in intervals
+                   if start <= top]
+      if len(prefixes) * sum(end - start for start, end in intervals) <= maxranges:
+        prefixes = [prefix + _chr(point)
+                    for prefix in prefixes
+                    for start, end in intervals
+                    for point in range(start, end)]
+        continue
+      ranges = [
+        (prefix + _chr(start),
+         prefix + _chr(end) if end <= top else _successor(prefix, top))
+        for prefix in prefixes
+        for start, end in intervals]
+      break
+    if ranges is not None:
+      break
+  else:
+    # (the regex "$" also matches before a trailing newline)
+    ranges = [(prefix, prefix + '\x0b') for prefix in prefixes]
+  ret = []
+  for start, end in sorted(ranges, key=lambda item: item[0]):
+    if ret and ( ret[-1][1] is None or start <= ret[-1][1] ):
+      if ret[-1][1] is not None and ( end is None or end > ret[-1][1] ):
+        ret[-1] = (ret[-1][0], end)
+      continue
+    ret.append((start, end))
+  if asbytes:
+    ret = [(start.encode('latin-1'), None if end is None else end.encode('latin-1'))
+           for start, end in ret]
+  return ret
+
+#------------------------------------------------------------------------------
+class SortedKeys(object):
+  '''
+  The `scan_keys` store adapter for a sorted sequence of `keys` (e.g.
+  a list), which finds the ranges by bisection.
+  '''
+  def __init__(self, keys):
+    self.keys = keys
+  def range(self, start, end):
+    keys = self.keys
+    low  = bisect.bisect_left(keys, start)
+    high = len(keys) if end is None else bisect.bisect_left(keys, end, low)
+    for idx in range(low, high):
+      yield keys[idx]
+
+#------------------------------------------------------------------------------
+def scan_keys(pattern, store, sep=None, flags=0, key=None, maxranges=64):
+  '''
+  Generates the items of the sorted `store` whose keys the glob
+  `pattern` matches in their entirety, in key order, by only scanning
+  the `key_ranges` of `pattern` (see there for `maxranges`, and see
+  `globre.compile` for details on `sep` and `flags`).
+
+  The `store` adapter only needs a ``range(start, end)`` method that
+  returns an iterable of the items whose key is greater than or equal
+  to `start` and, unless `end` is ``None``, less than `end`, in key
+  order. If the items are not the keys themselves, `key` is called
+  with each item to get its key. For example, for an SQLite table:
+
+  .. code:: python
+
+    class Table(object):
+      def __init__(self, db):
+        self.db = db
+      def range(self, start, end):
+        if end is None:
+          return self.db.execute(
+            'SELECT key, value FROM t WHERE key >= ? ORDER BY key', (start,))
+        return self.db.execute(
+          'SELECT key, value FROM t WHERE key >= ? AND key < ? ORDER BY key',
+          (start, end))
+
+    for key, value in globre.scan_keys('logs/2024-*/**.gz', Table(db),
+                                       key=lambda item: item[0]):
+      ...
+  '''
+  match = compile(pattern, flags=flags | EXACT, sep=sep).match
+  for start, end in key_ranges(pattern, sep=sep, flags=flags, maxranges=maxranges):
+    for item in store.range(start, end):
+      if match(item if key is None else key(item)):
+        yield item
+
+#------------------------------------------------------------------------------
+# end of $Id$
+#------------------------------------------------------------------------------
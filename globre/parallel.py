@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+#------------------------------------------------------------------------------
+# file: $Id$
+# auth: metagriffin <mg.github@uberdev.org>
+# date: 2026/10/18
+# copy: (C) Copyright 2013-EOT metagriffin -- see LICENSE.txt
+#------------------------------------------------------------------------------
+# This software is free software: you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This software is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see http://www.gnu.org/licenses/.
+#------------------------------------------------------------------------------
+
+import collections
+import itertools
+import multiprocessing
+
+try:
+  import queue
+except ImportError:
+  import Queue as queue
+
+from .globset import GlobSet
+from .bulk import filter_many
+
+# the GlobSet of the current worker process, built once by `_init`
+_worker_globset = None
+
+#------------------------------------------------------------------------------
+def _init(patterns, sep, flags):
+  global _worker_globset
+  _worker_globset = GlobSet(patterns, sep=sep, flags=flags)
+
+#------------------------------------------------------------------------------
+def _work(chunk):
+  return list(filter_many(_worker_globset, chunk))
+
+#------------------------------------------------------------------------------
+def _work_unordered(chunk):
+  # returns the ``(error, result)`` of `_work`, since the `callback` of
+  # `Pool.apply_async` is only called on success, and Python 2 has no
+  # `error_callback`
+  try:
+    return (None, _work(chunk))
+  except Exception as exc:
+    return (exc, None)
+
+#------------------------------------------------------------------------------
+def _chunks(iterable, chunksize):
+  iterator = iter(iterable)
+  while True:
+    chunk = list(itertools.islice(iterator, chunksize))
+    if not chunk:
+      return
+    yield chunk
+
+#------------------------------------------------------------------------------
+def parallel_filter(patterns, iterable, sep=None, flags=0,
+                    workers=None, chunksize=10000, ordered=True,
+                    maxpending=None):
+  '''
+  Generates the items of `iterable` that match any of the glob
+  `patterns`, using a pool of `workers` processes (which defaults to
+  the number of CPUs). The results are identical to those of
+  ``globre.filter_many(patterns, iterable, sep=sep, flags=flags)``.
+
+  The pattern specifications (`patterns`, `sep` and `flags`) are sent
+  to each worker process only once, where they are compiled into a
+  `globre.GlobSet`. The `iterable` is then consumed lazily in chunks
+  of `chunksize` items, with at most `maxpending` chunks (which
+  defaults to twice the number of workers) being processed or
+  waiting to be consumed at any time, which keeps memory bounded
+  even for unbounded inputs.
+
+  If `ordered` is truthy (the default), the matching items are
+  generated in input order, otherwise they are generated as soon as
+  their chunk has been processed.
+
+  `patterns` may also be a `globre.GlobSet`, in which case its
+  `patterns`, `sep` and `flags` are used.
+  '''
+  if isinstance(patterns, GlobSet):
+    patterns, sep, flags = patterns.patterns, patterns.sep, patterns.flags
+  else:
+    patterns = list(patterns)
+  workers = workers or multiprocessing.cpu_count()
+  maxpending = maxpending or workers * 2
+  pool = multiprocessing.Pool(workers, _init, (patterns, sep, flags))
+  try:
+    done    = queue.Queue()
+    pending = collections.deque()
+    chunks  = _chunks(iterable, chunksize)
+    while True:
+      for chunk in chunks:
+        if ordered:
+          pending.append(pool.apply_async(_work, (chunk,)))
+        else:
+          pending.append(pool.apply_async(
+            _work_unordered, (chunk,), callback=done.put))
+        if len(pending) >= maxpending:
+          break
+      if not pending:
+        break
+      if ordered:
+        result = pending.popleft().get()
+      else:
+        # in unordered mode, `pending` only serves to count the
+        # outstanding chunks: results are taken in completion order
+        pending.popleft()
+        error, result = done.get()
+        if error is not None:
+          raise error
+      for item in result:
+        yield item
+    pool.close()
+  finally:
+    pool.terminate()
+    pool.join()
+
+#------------------------------------------------------------------------------
+# end of $Id$
+#------------------------------------------------------------------------------
@@ -0,0 +1,265 @@
+# -*- coding: utf-8 -*-
+#------------------------------------------------------------------------------
+# file: $Id$
+# auth: metagriffin <mg.github@uberdev.org>
+# date: 2026/10/18
+# copy: (C) Copyright 2013-EOT metagriffin -- see LICENSE.txt
+#------------------------------------------------------------------------------
+# This software is free software: you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This software is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see http://www.gnu.org/licenses/.
+#------------------------------------------------------------------------------
+
+'''
+Persistent storage of compiled glob sets.
+
+A set of glob patterns can be translated once and written to a file
+with `dump`, which stores everything needed to rebuild a
+`globre.GlobSet` and a `globre.PrefixIndex` for them (their engine
+programs, regex sources and literal prefixes), so that `load` can
+restore them without running the `globre.Tokenizer` or
+`globre.compile` again. Files are memory-mapped when loaded and are
+only used if they were written for the exact same patterns, `sep`
+and `flags` by the same version of globre, including the same code of
+its translation modules even if it is not installed as a distribution
+(otherwise `load` returns ``None``).
+'''
+
+import os, re, mmap, marshal, hashlib, tempfile
+
+from . import compile, Tokenizer, CompiledGlob, EXACT, FORCE_RE, NORMSEP, GLOBFLAGS
+from . import engine
+from .globset import GlobSet
+from .index import PrefixIndex
+
+MAGIC  = b'GLOBRE\x00'
+FORMAT = 1
+
+# the modules whose code determines the stored translations
+SOURCES = ('__init__.py', 'engine.py', 'persist.py')
+
+# the permissions of the files written by `dump`
+MODE = 0o644
+
+_fingerprint_hex = None
+
+#------------------------------------------------------------------------------
+def _version():
+  try:
+    from importlib.metadata import version
+  except ImportError:
+    try:
+      import pkg_resources
+      return pkg_resources.get_distribution('globre').version
+    except Exception:
+      return 'unknown'
+  try:
+    return version('globre')
+  except Exception:
+    return 'unknown'
+
+#------------------------------------------------------------------------------
+def _fingerprint():
+  # the digest of the code of the translation modules, which changes
+  # with the translation even if the version is not known (e.g. for a
+  # vendored copy or a source checkout of globre)
+  global _fingerprint_hex
+  if _fingerprint_hex is None:
+    ret  = hashlib.sha256()
+    base = os.path.dirname(os.path.abspath(__file__))
+    try:
+      for name in SOURCES:
+        with open(os.path.join(base, name), 'rb') as fp:
+          ret.update(fp.read())
+    except (IOError, OSError):
+      # e.g. only the byte-code is installed
+      ret.update(_version().encode('utf-8'))
+    _fingerprint_hex = ret.hexdigest()
+  return _fingerprint_hex
+
+#------------------------------------------------------------------------------
+def digest(patterns, sep=None, flags=0):
+  '''
+  Returns the SHA-256 digest (as bytes) that identifies the compiled
+  form of `patterns` with `sep` and `flags` for this version of
+  globre and of the file format.
+  '''
+  return hashlib.sha256(marshal.dumps(
+    (FORMAT, _version(), _fingerprint(), list(patterns), sep, flags | EXACT))).digest()
+
+#------------------------------------------------------------------------------
+class _LazyMatch(object):
+  # a regex `match` function that compiles the regex on first use
+  __slots__ = ('source', 'flags', 'match')
+  def __init__(self, source, flags):
+    self.source = source
+    self.flags  = flags
+    self.match  = None
+  def __call__(self, string):
+    if self.match is None:
+      self.match = re.compile(self.source, self.flags).match
+    return self.match(string)
+
+#------------------------------------------------------------------------------
+class CompiledSet(object):
+  '''
+  The compiled form of a list of glob `patterns`, as returned by
+  `load` and `build`. The `prefixes` and `regexes` attributes list
+  the literal prefix and the regex source of each pattern, and the
+  `globset` and `index` attributes provide the corresponding
+  `globre.GlobSet` and `globre.PrefixIndex` (created on first access).
+  Patterns are matched in their entirety, like `globre.match`.
+  '''
+  def __init__(self, patterns, sep, flags, prefixes, regexes, programs):
+    self.patterns = patterns
+    self.sep      = sep
+    self.flags    = flags | EXACT
+    self.prefixes = prefixes
+    self.regexes  = regexes
+    self.programs = programs
+    self._globset = None
+    self._index   = None
+  @property
+  def globset(self):
+    if self._globset is None:
+      self._globset = GlobSet(
+        self.patterns, sep=self.sep, flags=self.flags,
+        programs=self.programs, regexes=self.regexes)
+    return self._globset
+  @property
+  def index(self):
+    if self._index is None:
+      index = PrefixIndex(sep=self.sep, flags=self.flags)
+      flags = self.flags & ~ GLOBFLAGS
+      for prefix, pattern, regex in zip(self.prefixes, self.patterns, self.regexes):
+        index.insert(prefix, pattern, _LazyMatch(regex, flags))
+      self._index = index
+    return self._index
+  def _state(self):
+    return dict(
+      patterns = self.patterns,
+      sep      = self.sep,
+      flags    = self.flags,
+      prefixes = self.prefixes,
+      regexes  = self.regexes,
+      programs = self.programs,
+    )
+
+#------------------------------------------------------------------------------
+def build(patterns, sep=None, flags=0):
+  '''
+  Translates the glob `patterns` into a `CompiledSet` (without
+  storing it).
+  '''
+  patterns = list(patterns)
+  flags   |= EXACT
+  prefixes = []
+  regexes  = []
+  # the stored regexes match the strings as they are, so they are
+  # translated with classes of all the separators, like the programs,
+  # instead of for normalized strings
+  xflags   = ( flags | FORCE_RE ) & ~ NORMSEP
+  for pattern in patterns:
+    result = compile(pattern, flags=xflags, sep=sep, split_prefix=True)
+    if not isinstance(result, tuple):
+      # `split_prefix` yields no prefix for the empty pattern
+      result = ('', result)
+    prefix = result[0]
+    if CompiledGlob(pattern, sep=sep, flags=flags).has(Tokenizer.REGEX):
+      # (inline regex can quantify or alternate the literal prefix, see
+      # `PrefixIndex`)
+      prefix = prefix[:0]
+    prefixes.append(prefix)
+    regexes.append(result[1].pattern)
+  programs = [engine.program(pattern, flags=flags, sep=sep) for pattern in patterns]
+  return CompiledSet(patterns, sep, flags, prefixes, regexes, programs)
+
+#------------------------------------------------------------------------------
+def dump(compiled, path):
+  '''
+  Writes the `CompiledSet` `compiled` to the file `path`. The file is
+  written to a temporary file first and then renamed, so that
+  concurrent readers never see a partially written file, and is made
+  readable by all users (see `MODE`), so that it can be shared.
+  '''
+  body = marshal.dumps(compiled._state())
+  head = MAGIC + digest(compiled.patterns, compiled.sep, compiled.flags)
+  fd, tmp = tempfile.mkstemp(
+    dir=os.path.dirname(os.path.abspath(path)), prefix='.globre-')
+  try:
+    with os.fdopen(fd, 'wb') as fp:
+      fp.write(head)
+      fp.write(body)
+    # (`mkstemp` creates the file readable by its owner only)
+    os.chmod(tmp, MODE)
+    # (unlike `os.rename`, `os.replace` overwrites `path` on Windows)
+    getattr(os, 'replace', os.rename)(tmp, path)
+  except Exception:
+    os.unlink(tmp)
+    raise
+
+#------------------------------------------------------------------------------
+def load(path, patterns, sep=None, flags=0):
+  '''
+  Loads the `CompiledSet` stored in the file `path`, returning
+  ``None`` if the file does not exist, is damaged or was not written
+  for exactly these `patterns`, `sep` and `flags` by this version of
+  globre.
+  '''
+  expected = MAGIC + digest(patterns, sep, flags)
+  try:
+    fp = open(path, 'rb')
+  except (IOError, OSError):
+    return None
+  with fp:
+    try:
+      data = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+    except (ValueError, mmap.error):
+      # e.g. an empty file
+      return None
+    try:
+      if data[:len(expected)] != expected:
+        return None
+      view = memoryview(data)
+      try:
+        state = marshal.loads(view[len(expected):])
+      except (EOFError, ValueError, TypeError):
+        # a truncated or corrupt body
+        return None
+      finally:
+        view.release()
+    finally:
+      data.close()
+  if not isinstance(state, dict):
+    return None
+  try:
+    return CompiledSet(**state)
+  except TypeError:
+    return None
+
+#------------------------------------------------------------------------------
+def load_or_build(path, patterns, sep=None, flags=0):
+  '''
+  Returns the `CompiledSet` for `patterns` stored in `path` if it is
+  up-to-date (see `load`), otherwise builds it and stores it in
+  `path` for the next time.
+  '''
+  patterns = list(patterns)
+  ret = load(path, patterns, sep=sep, flags=flags)
+  if ret is None:
+    ret = build(patterns, sep=sep, flags=flags)
+    dump(ret, path)
+  return ret
+
+#------------------------------------------------------------------------------
+# end of $Id$
+#------------------------------------------------------------------------------
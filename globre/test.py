@@ -19,7 +19,7 @@
 # along with this program. If not, see http://www.gnu.org/licenses/.
 #------------------------------------------------------------------------------
 
-import unittest, re
+import unittest, re, os, sys, json, shutil, tempfile, sqlite3
 
 import globre
 
@@ -92,6 +92,33 @@ class TestGlobre(unittest.TestCase):
        ('literal', '.txt', 16, 20),
        ])
 
+  #----------------------------------------------------------------------------
+  def test_tokenizer_escapes(self):
+    self.assertEqual(
+      globre.Tokenizer(r'\*\\\?a\[{\}x}[\]]**').tokens(aslist=True),
+      [('literal', '*\\?a[', 0, 9),
+       ('regex', '}x', 9, 14),
+       ('range', ']', 14, 18),
+       ('any', '**', 18, 20),
+       ])
+    self.assertEqual(
+      globre.Tokenizer('a\\*' * 1000).tokens(aslist=True),
+      [('literal', 'a*' * 1000, 0, 3000)])
+    tokens = globre.Tokenizer('a?b\\').tokens()
+    self.assertEqual(next(tokens), ('literal', 'a', 0, 1))
+    self.assertEqual(next(tokens), ('single', '?', 1, 2))
+    with self.assertRaises(ValueError) as cm:
+      next(tokens)
+    self.assertEqual(str(cm.exception), 'dangling backslash "\\" in glob: a?b\\')
+    for pattern, message in (
+        ('a[b', 'no terminating "]" in glob: a[b'),
+        ('a{b\\}', 'no terminating "}" in glob: a{b\\}'),
+        ('a[b\\', 'dangling backslash "\\" in glob: a[b\\'),
+        ):
+      with self.assertRaises(ValueError) as cm:
+        globre.Tokenizer(pattern).tokens(aslist=True)
+      self.assertEqual(str(cm.exception), message)
+
   #----------------------------------------------------------------------------
   def test_iswild(self):
     self.assertTrue(globre.iswild('/foo/bar/**.ini'))
@@ -137,6 +164,26 @@ class TestGlobre(unittest.TestCase):
     self.assertIsNone(expr.match('/foo/bar/a.dir/conf.ini.x'))
     self.assertIsNone(expr.match('/x/foo/bar/a.dir/conf.ini'))
 
+  #----------------------------------------------------------------------------
+  def test_compile_exact_dollar(self):
+    # a trailing literal "$" is escaped and therefore still anchored
+    self.assertIsNone(globre.match('a$', 'a$xyz'))
+    self.assertIsNone(globre.match('a$', 'a$xyz', flags=globre.FORCE_RE))
+    self.assertIsNotNone(globre.match('a$', 'a$'))
+    self.assertIsNotNone(globre.match('{a$}', 'a'))
+    self.assertIsNotNone(globre.match('a\\\\$', 'a\\$'))
+    self.assertIsNone(globre.match('a\\\\$', 'a\\$x'))
+    for pattern in ('**.txt$', '*$', 'a$'):
+      gset = globre.GlobSet([pattern])
+      for name in ('a.txt$', 'a.txt$xyz', 'a$', 'a$b$', 'a'):
+        expected = re.match(
+          globre.compile(pattern, flags=globre.EXACT | globre.FORCE_RE).pattern, name)
+        for flags in (0, globre.FORCE_RE, globre.LINEAR):
+          self.assertEqual(
+            bool(globre.match(pattern, name, flags=flags)), bool(expected),
+            (pattern, name, flags))
+        self.assertEqual(bool(gset.matches(name)), bool(expected), (pattern, name))
+
   #----------------------------------------------------------------------------
   def test_prefix(self):
     self.assertEqual(globre.compile('/foo/bar', split_prefix=True)[0], '/foo/bar')
@@ -192,6 +239,679 @@ class TestGlobre(unittest.TestCase):
     self.assertIsNone(globre.match('\\\\foo/*.ini', '\\foo\\bar\\conf.ini', sep='/\\'))
     self.assertIsNone(globre.match('\\\\foo/*.ini', '/foo\\bar/conf.ini', sep='/\\'))
 
+  #----------------------------------------------------------------------------
+  def test_sep_multi_literal(self):
+    self.assertIsNotNone(globre.match('a.b/c+', 'a.b\\c+', sep='/\\'))
+    self.assertIsNone(globre.match('a.b/c+', 'aXb\\cc', sep='/\\'))
+    self.assertIsNotNone(globre.match(r'a\\b/c', 'a\\b#c', sep='/#'))
+
+  #----------------------------------------------------------------------------
+  def test_sep_normsep(self):
+    flags = globre.NORMSEP | globre.EXACT
+    expr  = globre.compile('/foo/**.ini', sep='/\\', flags=flags)
+    self.assertIsInstance(expr, globre.NormalizedPattern)
+    self.assertIsInstance(expr.regex, globre.FastPattern)
+    self.assertEqual(expr.normalize('\\foo\\bar/c.ini'), '/foo/bar/c.ini')
+    self.assertEqual(expr.match('\\foo\\bar/c.ini').span(), (0, 14))
+    self.assertIsNone(expr.match('\\foo\\bar/c.txt'))
+    expr = globre.compile('\\\\foo#*.ini', sep='/\\#', flags=flags)
+    self.assertEqual(expr.regex.pattern, globre.compile('/foo/*.ini', flags=flags).pattern)
+    self.assertIsNotNone(expr.match('#foo\\conf.ini'))
+    self.assertIsNone(expr.match('/foo/bar\\conf.ini'))
+    self.assertIsNotNone(globre.match('/foo/*.ini', '\\foo\\conf.ini', sep='/\\', flags=flags))
+    self.assertIs(globre.compile('/foo/*.ini', sep='/', flags=flags).__class__,
+                  globre.compile('/foo/*.ini', sep='/', flags=globre.EXACT).__class__)
+    for sep in (b'/\\', b'/\\#'):
+      expr = globre.compile(b'a/*', sep=sep, flags=flags)
+      for data in (b'a\\b', bytearray(b'a\\b'), memoryview(b'a\\b')):
+        self.assertEqual(expr.match(data).span(), (0, 3))
+        self.assertIsNone(expr.match(data, 1))
+      self.assertEqual(expr.normalize(memoryview(b'a\\b')), b'a/b')
+
+  #----------------------------------------------------------------------------
+  def test_cache(self):
+    cache = globre.PatternCache(maxsize=2)
+    expr = cache.get('/foo/*.ini', flags=globre.EXACT)
+    self.assertIs(cache.get('/foo/*.ini', flags=globre.EXACT), expr)
+    self.assertIsNot(cache.get('/foo/*.ini'), expr)
+    cache.get('/bar/*.ini')
+    self.assertEqual(
+      cache.stats(),
+      dict(hits=1, misses=3, evictions=1, size=2, maxsize=2, policy='lru'))
+    cache.purge()
+    self.assertEqual(len(cache), 0)
+    self.assertEqual(cache.stats()['hits'], 1)
+
+  #----------------------------------------------------------------------------
+  def test_cache_policy(self):
+    lru = globre.PatternCache(maxsize=2)
+    fifo = globre.PatternCache(maxsize=2, policy=globre.PatternCache.FIFO)
+    for cache in (lru, fifo):
+      cache.get('a*')
+      cache.get('b*')
+      cache.get('a*')
+      cache.get('c*')
+    self.assertEqual(sorted(key[0] for key in lru.entries), ['a*', 'c*'])
+    lru.get('a*')
+    self.assertEqual(lru.stats()['hits'], 2)
+    fifo.get('a*')
+    self.assertEqual(fifo.stats()['hits'], 1)
+    lru.configure(0)
+    self.assertEqual(len(lru), 0)
+    lru.get('a*')
+    self.assertEqual(len(lru), 0)
+    self.assertRaises(ValueError, lru.configure, 1, policy='mru')
+
+  #----------------------------------------------------------------------------
+  def test_cache_default(self):
+    globre.purge()
+    self.assertEqual(len(globre.cache), 0)
+    self.assertIsNotNone(globre.match('/foo/*.ini', '/foo/conf.ini'))
+    self.assertIsNotNone(globre.match('/foo/*.ini', '/foo/app.ini'))
+    self.assertEqual(len(globre.cache), 1)
+  #----------------------------------------------------------------------------
+  def test_profiler(self):
+    events  = []
+    exact   = globre.compile('/foo/*.ini', flags=globre.EXACT).pattern
+    inexact = globre.compile('*.ini').pattern
+    globre.purge()
+    self.assertIsNone(globre.set_profiler(
+      lambda *args: events.append(args[:2] + args[3:])))
+    try:
+      self.assertIsNotNone(globre.match('/foo/*.ini', '/foo/conf.ini'))
+      self.assertIsNone(globre.search('*.ini', 'conf.txt'))
+    finally:
+      self.assertIsNotNone(globre.set_profiler(None))
+    self.assertEqual(events, [
+      ('tokenize', '/foo/*.ini'),
+      ('translate', '/foo/*.ini', exact),
+      ('compile', '/foo/*.ini'),
+      ('cache_miss', '/foo/*.ini'),
+      ('match', '/foo/*.ini', exact),
+      ('tokenize', '*.ini'),
+      ('translate', '*.ini', inexact),
+      ('compile', '*.ini'),
+      ('cache_miss', '*.ini'),
+      ('search', '*.ini', inexact),
+    ])
+    with globre.Profiler(slowest=2) as profiler:
+      for idx in range(5):
+        globre.match('/foo/%d/**.ini' % (idx % 3,), '/foo/1/conf.ini')
+    self.assertIsNone(globre.set_profiler(None))
+    stats = profiler.stats()
+    self.assertEqual(
+      sorted(stats['phases'].keys()),
+      ['cache_hit', 'cache_miss', 'compile', 'match', 'tokenize', 'translate'])
+    self.assertEqual(stats['phases']['match']['count'], 5)
+    self.assertEqual(stats['cache'], dict(hits=2, misses=3, hit_rate=0.4))
+    self.assertEqual(len(stats['slowest']), 2)
+    self.assertEqual(stats['slowest'][0]['source'][:6], '^/foo/')
+  #----------------------------------------------------------------------------
+  def test_globset(self):
+    gset = globre.GlobSet([
+      '/foo/**.ini',
+      '/foo/*.ini',
+      r'/foo/{\\d+}.ini',
+      '/bar/**',
+      '/foo/conf.ini',
+    ])
+    self.assertEqual(len(gset), 5)
+    self.assertEqual(gset.matches('/foo/conf.ini'), [0, 1, 4])
+    self.assertEqual(gset.matches('/foo/12.ini'), [0, 1, 2])
+    self.assertEqual(gset.matches('/foo/sub/12.ini'), [0])
+    self.assertEqual(gset.matches('/zig/12.ini'), [])
+    self.assertEqual(gset.first('/foo/sub/12.ini'), 0)
+    self.assertEqual(gset.first('/bar/zog'), 3)
+    self.assertIsNone(gset.first('/zig/12.ini'))
+
+  #----------------------------------------------------------------------------
+  def test_globset_equivalence(self):
+    patterns = ['/foo/**.ini', '*.ini', '??.ini', '[a-c]*', '', '**',
+                '\\foo\\*.ini', '/foo/*']
+    names = ['/foo/bar/conf.ini', 'ab.ini', 'b.INI', '', '\\foo\\x.ini',
+             '/foo\\x.ini', '/foo/\n', 'ab.ini\n', 'Cx']
+    for sep in ('/', '/\\'):
+      for flags in (0, re.IGNORECASE, re.DOTALL):
+        gset = globre.compile_many(patterns, sep=sep, flags=flags)
+        for name in names:
+          self.assertEqual(
+            gset.matches(name),
+            [idx for idx, pattern in enumerate(patterns)
+             if globre.match(pattern, name, sep=sep, flags=flags)])
+  #----------------------------------------------------------------------------
+  def test_globset_scaling(self):
+    from globre.bench import _patterns, _names
+    patterns = _patterns(10000)
+    gset  = globre.GlobSet(patterns)
+    names = _names(3000, seed=1)
+    results = [gset.matches(name) for name in names]
+    exprs = [globre.compile(pattern, flags=globre.EXACT).match for pattern in patterns]
+    for name, result in list(zip(names, results))[:20]:
+      self.assertEqual(result, [idx for idx, expr in enumerate(exprs) if expr(name)])
+    # the DFA states only hold the NFA states of distinct pattern
+    # prefixes, not those of every pattern that is still active
+    automata = [gset.main] + [bucket[0] for bucket in gset.buckets.values()]
+    self.assertLess(sum(automaton.size for automaton in automata), 200000)
+    self.assertLess(len(gset.main.start.ids), 50)
+  #----------------------------------------------------------------------------
+  def test_subsumes(self):
+    self.assertTrue(globre.subsumes('logs/**', 'logs/*.txt'))
+    self.assertFalse(globre.subsumes('logs/*.txt', 'logs/**'))
+    self.assertTrue(globre.subsumes('logs/*', 'logs/[a-c]?.txt'))
+    self.assertTrue(globre.subsumes('**.txt', 'lo[g]s/*.txt'))
+    self.assertFalse(globre.subsumes('logs/*', 'logs/*/*'))
+    self.assertTrue(globre.subsumes('*/a', '[^/]/A', flags=re.IGNORECASE))
+    self.assertFalse(globre.subsumes('*/a', '[^/]/A'))
+    self.assertTrue(globre.subsumes('a/*', r'a\\b', sep='/\\'))
+    # without re.DOTALL, "*" matches newlines but "**" does not
+    self.assertFalse(globre.subsumes('logs/**', 'logs/*.txt', newlines=True))
+    self.assertTrue(
+      globre.subsumes('logs/**', 'logs/*.txt', flags=re.DOTALL, newlines=True))
+    # inline regex is handled conservatively
+    self.assertTrue(globre.subsumes('{a+}', '{a+}'))
+    self.assertFalse(globre.subsumes('**', '{a+}'))
+  #----------------------------------------------------------------------------
+  def test_overlaps(self):
+    self.assertTrue(globre.overlaps('logs/*.txt', 'logs/a*'))
+    self.assertTrue(globre.overlaps('**/b', 'a/**'))
+    self.assertFalse(globre.overlaps('*.txt', '*.log'))
+    self.assertFalse(globre.overlaps('a/*', 'a/*/b'))
+    self.assertFalse(globre.overlaps('[a-c]', '[d-f]'))
+    self.assertTrue(globre.overlaps('a', '{b}'))
+  #----------------------------------------------------------------------------
+  def test_minimize(self):
+    patterns = ['logs/*.txt', 'logs/**', 'x/y', '**.ini', 'x/*', 'lo[g]s/b',
+                'logs/**', '{a}', '{a}', 'x/[y]', 'etc/*.ini']
+    self.assertEqual(
+      globre.minimize(patterns), ['logs/**', '**.ini', 'x/*', '{a}'])
+    self.assertEqual(globre.minimize(['a/?', 'A/*'], flags=re.IGNORECASE), ['A/*'])
+    self.assertEqual(globre.minimize([]), [])
+  #----------------------------------------------------------------------------
+  def test_mutable_globset(self):
+    gset = globre.MutableGlobSet(['/etc/**'])
+    for idx in range(50):
+      gset.add('/var/%d/*.log' % (idx,), idx)
+    gset.add(r'/opt/{\\d+}/bin', 'opt')
+    self.assertEqual(len(gset), 52)
+    self.assertLess(len(gset.snapshot().segments), 8)
+    self.assertEqual(gset.matches('/var/7/x.log'), [7])
+    self.assertEqual(gset.matches('/etc/passwd'), ['/etc/**'])
+    self.assertEqual(gset.matches('/opt/12/bin'), ['opt'])
+    self.assertFalse(gset.any('/var/7/x.txt'))
+    snapshot = gset.snapshot()
+    gset.add('/var/7/**', 'seven')
+    gset.add('/var/7/x.*', 7)
+    gset.remove('/etc/**')
+    self.assertEqual(gset.matches('/var/7/x.log'), ['seven', 7])
+    self.assertEqual(gset.matches('/etc/passwd'), [])
+    # snapshots are not affected by later updates
+    self.assertEqual(snapshot.matches('/var/7/x.log'), [7])
+    self.assertEqual(snapshot.matches('/etc/passwd'), ['/etc/**'])
+    for idx in range(50):
+      if idx != 7:
+        gset.remove(idx)
+    self.assertEqual(len(gset), 3)
+    self.assertEqual(len(gset.snapshot()), 3)
+    self.assertEqual(gset.matches('/var/8/x.log'), [])
+    self.assertEqual(gset.matches('/opt/12/bin'), ['opt'])
+    self.assertNotIn(8, gset)
+    with self.assertRaises(KeyError):
+      gset.remove(8)
+  #----------------------------------------------------------------------------
+  def test_compiled_glob(self):
+    glob = globre.CompiledGlob('/foo/*.ini', flags=globre.EXACT)
+    self.assertEqual(glob.prefix, '/foo/')
+    self.assertEqual(list(glob.types), [
+      globre.Tokenizer.codes[globre.Tokenizer.LITERAL],
+      globre.Tokenizer.codes[globre.Tokenizer.MULTIPLE],
+      globre.Tokenizer.codes[globre.Tokenizer.LITERAL]])
+    self.assertFalse(glob.isliteral)
+    self.assertTrue(glob.has(globre.Tokenizer.MULTIPLE, globre.Tokenizer.ANY))
+    self.assertFalse(glob.has(globre.Tokenizer.ANY))
+    self.assertFalse(glob.iscompiled)
+    self.assertIsNotNone(glob.match('/foo/conf.ini'))
+    self.assertIsNone(glob.match('/foo/bar/conf.ini'))
+    self.assertTrue(glob.iscompiled)
+    self.assertEqual(glob.matcher.pattern, globre.compile('/foo/*.ini', flags=globre.EXACT).pattern)
+    glob = globre.CompiledGlob(r'/foo/\*', sep='/\\')
+    self.assertTrue(glob.isliteral)
+    self.assertEqual(glob.prefix, '/foo/*')
+    self.assertEqual(globre.CompiledGlob('', flags=globre.EXACT).prefix, '')
+    glob = globre.CompiledGlob(b'\\\\foo\\\\*', sep=b'/\\', flags=globre.NORMSEP)
+    self.assertEqual(glob.prefix, b'/foo/')
+    self.assertIsNotNone(glob.search(b'/foo\\bar'))
+  #----------------------------------------------------------------------------
+  def test_prefix_index(self):
+    index = globre.PrefixIndex([
+      '/foo/**.ini',
+      '/foo/bar/*.txt',
+      '/foo/bar/zig/**',
+      '**.log',
+    ])
+    index.add('/zog/*', value='zog')
+    self.assertEqual(len(index), 5)
+    self.assertEqual(
+      sorted(index.candidates('/foo/bar/conf.ini')),
+      [('', '**.log'), ('/foo/', '/foo/**.ini'), ('/foo/bar/', '/foo/bar/*.txt')])
+    self.assertEqual(index.match('/foo/bar/conf.ini'), ['/foo/**.ini'])
+    self.assertEqual(index.match('/foo/bar/zig/x.log'), ['/foo/bar/zig/**', '**.log'])
+    self.assertEqual(index.match('/zog/a'), ['zog'])
+    self.assertEqual(index.match('/zig/a'), [])
+    self.assertEqual(index.under('/foo'), ['/foo/', '/foo/bar/', '/foo/bar/zig/'])
+    self.assertEqual(index.under('/foo/bar/'), ['/foo/bar/', '/foo/bar/zig/'])
+    self.assertEqual(index.under('/zig'), [])
+    # inline regex can quantify or alternate the literal prefix
+    index = globre.PrefixIndex(['ab{?}', 'a{|x.*}', 'ab*'])
+    self.assertEqual(index.match('a'), ['ab{?}', 'a{|x.*}'])
+    self.assertEqual(index.match('xyz'), ['a{|x.*}'])
+    index = globre.persist.build(['ab{?}', 'a{|x.*}', 'ab*']).index
+    self.assertEqual(index.match('a'), ['ab{?}', 'a{|x.*}'])
+    self.assertEqual(index.match('xyz'), ['a{|x.*}'])
+
+  #----------------------------------------------------------------------------
+  def test_prefix_index_sep_multi(self):
+    index = globre.PrefixIndex(['/foo/*.ini', '\\\\bar\\\\*.ini'], sep='/\\')
+    self.assertEqual(index.match('\\foo\\conf.ini'), ['/foo/*.ini'])
+    self.assertEqual(index.match('/bar/conf.ini'), ['\\\\bar\\\\*.ini'])
+  #----------------------------------------------------------------------------
+  def test_filter(self):
+    names = ['/etc/a.conf', '/etc/x/b.conf', '/var/c.conf']
+    result = globre.filter('/etc/*.conf', iter(names))
+    self.assertFalse(isinstance(result, list))
+    self.assertEqual(list(result), ['/etc/a.conf'])
+    expr = globre.compile('/etc/**.conf', flags=globre.EXACT)
+    self.assertEqual(list(globre.filter(expr, names)), names[:2])
+    self.assertEqual(
+      list(globre.filter_many(['/var/*', '/etc/x/**'], names)), names[1:])
+    gset = globre.GlobSet(['/var/*', '/etc/*.conf'])
+    self.assertEqual(list(globre.filter_many(gset, names)), [names[0], names[2]])
+
+  #----------------------------------------------------------------------------
+  def test_mask(self):
+    names = ['/etc/a.conf', '/etc/x/b.conf', '/var/c.conf']
+    self.assertEqual(globre.mask('/etc/*.conf', names), [True, False, False])
+    self.assertEqual(
+      globre.mask_many(['/var/*', '/etc/x/**'], names), [False, True, True])
+    try:
+      import numpy
+    except ImportError:
+      return
+    result = globre.mask('/etc/**', numpy.array(names))
+    self.assertEqual(result.dtype, numpy.bool_)
+    self.assertEqual(result.tolist(), [True, True, False])
+    result = globre.mask_many(['/var/*'], numpy.array(names, dtype=object))
+    self.assertEqual(result.tolist(), [False, False, True])
+  #----------------------------------------------------------------------------
+  def test_bytes(self):
+    expr = globre.compile(b'/foo/**.\xe9', flags=globre.EXACT)
+    for data in (b'/foo/a/b.\xe9', bytearray(b'/foo/a/b.\xe9')):
+      self.assertIsNotNone(expr.match(data))
+    self.assertIsNone(expr.match(b'/foo/a/b.e'))
+    view = memoryview(b'/foo/*.txt|/x/foo/b.txt')
+    expr = globre.compile(b'/foo/*.txt', sep=b'|/')
+    self.assertEqual(expr.fullmatch(view, 0, 10).span(), (0, 10))
+    self.assertIsNone(expr.fullmatch(view, 11))
+    self.assertEqual(expr.search(view, 11).span(), (13, 23))
+    self.assertEqual(
+      globre.compile(b'/foo/*.txt', split_prefix=True)[0], b'/foo/')
+    self.assertIsNotNone(globre.match(b'a*', b'abc'))
+    self.assertIsNotNone(globre.match(bytearray(b'a*'), b'abc'))
+    self.assertIsNotNone(globre.match(b'a/*', b'a|c', sep=bytearray(b'/|')))
+    with self.assertRaises(ValueError):
+      globre.compile(b'a*', flags=globre.LINEAR)
+  #----------------------------------------------------------------------------
+  def test_scan_records(self):
+    data = b'/a/x.log\n/b/y.txt\n/a/b/z.log\n\n/a/q.log'
+    for buf in (data, bytearray(data), memoryview(data)):
+      self.assertEqual(
+        list(globre.scan_records(b'/a/*.log', buf)), [(0, 8), (30, 38)])
+      self.assertEqual(
+        list(globre.scan_records(b'/a/**', buf, pos=18, endpos=37)), [(18, 28), (30, 37)])
+    self.assertEqual(
+      list(globre.scan_records(globre.compile(b'*'), b'a\0\0b\0', delimiter=b'\0')),
+      [(0, 1), (2, 2), (3, 4)])
+    data = data.replace(b'/a/x', b'\\a\\x')
+    for buf in (data, bytearray(data), memoryview(data)):
+      for pattern in (b'/a/*.log', globre.compile(b'/a/*.log', sep=b'/\\', flags=globre.NORMSEP)):
+        self.assertEqual(
+          list(globre.scan_records(pattern, buf, sep=b'/\\', flags=globre.NORMSEP)),
+          [(0, 8), (30, 38)])
+      self.assertEqual(
+        list(globre.scan_records(
+          b'/a/**', buf, sep=b'/\\', flags=globre.NORMSEP, pos=9, endpos=37)),
+        [(18, 28), (30, 37)])
+  #----------------------------------------------------------------------------
+  def test_key_ranges(self):
+    self.assertEqual(
+      globre.key_ranges('logs/202[34]-*'),
+      [('logs/2023-', 'logs/2023.'), ('logs/2024-', 'logs/2024.')])
+    self.assertEqual(globre.key_ranges('a/b?c'), [('a/b\x00', 'a/b/'), ('a/b0', 'a/c')])
+    self.assertEqual(globre.key_ranges('a/b'), [('a/b', 'a/b\x0b')])
+    self.assertEqual(globre.key_ranges('a/b', sep='/:'), [('a/b', 'a/b\x0b'), ('a:b', 'a:b\x0b')])
+    self.assertEqual(globre.key_ranges('a[bc]**'), [('ab', 'ad')])
+    self.assertEqual(globre.key_ranges('a[bc]**', maxranges=1), [('ab', 'ad')])
+    self.assertEqual(globre.key_ranges('**.gz'), [('', None)])
+    self.assertEqual(globre.key_ranges('x[^y]'), [('x\x00', 'xy'), ('xz', 'y')])
+    self.assertEqual(globre.key_ranges(b'x[a-z]*'), [(b'xa', b'x{')])
+    self.assertEqual(globre.key_ranges(r'a[^\\s\\S]b'), [])
+  #----------------------------------------------------------------------------
+  def test_scan_keys(self):
+    keys = sorted(['logs/%d-%02d/%s.%s' % (year, month, name, ext)
+                   for year in range(2020, 2025)
+                   for month in range(1, 13)
+                   for name in ('app', 'db')
+                   for ext in ('gz', 'txt')])
+    glob = 'logs/202[34]-0?/db.gz'
+    expected = [key for key in keys if globre.match(glob, key)]
+    self.assertEqual(len(expected), 18)
+    class Store(globre.SortedKeys):
+      scanned = 0
+      def range(self, start, end):
+        for key in globre.SortedKeys.range(self, start, end):
+          self.scanned += 1
+          yield key
+    store = Store(keys)
+    self.assertEqual(list(globre.scan_keys(glob, store)), expected)
+    self.assertEqual(store.scanned, 72)
+    db = sqlite3.connect(':memory:')
+    db.execute('CREATE TABLE t (key TEXT PRIMARY KEY, value INTEGER)')
+    db.executemany('INSERT INTO t VALUES (?, ?)', [(key, idx) for idx, key in enumerate(keys)])
+    class Table(object):
+      def range(self, start, end):
+        if end is None:
+          return db.execute(
+            'SELECT key, value FROM t WHERE key >= ? ORDER BY key', (start,))
+        return db.execute(
+          'SELECT key, value FROM t WHERE key >= ? AND key < ? ORDER BY key',
+          (start, end))
+    self.assertEqual(
+      list(globre.scan_keys(glob, Table(), key=lambda item: item[0])),
+      [(key, keys.index(key)) for key in expected])
+    self.assertEqual(
+      [item[0] for item in globre.scan_keys('**/app.txt', Table(), key=lambda item: item[0])],
+      [key for key in keys if key.endswith('/app.txt')])
+    # inline regex can quantify or alternate the literals before it
+    keys = sorted(['a', 'ab', 'ac', 'b', 'x', 'xyz'])
+    for glob in ('ab{?}', 'a{|x.*}'):
+      self.assertEqual(globre.key_ranges(glob), [('', None)])
+      self.assertEqual(
+        list(globre.scan_keys(glob, globre.SortedKeys(keys))),
+        [key for key in keys if globre.match(glob, key)])
+    self.assertEqual(globre.key_ranges(b'a{b}'), [(b'', None)])
+  #----------------------------------------------------------------------------
+  def test_iglob(self):
+    root = tempfile.mkdtemp()
+    try:
+      for name in ('a/b/c.txt', 'a/b/d.ini', 'a/e.txt', 'f.txt', 'g/h/i/j.txt'):
+        path = os.path.join(root, *name.split('/'))
+        if not os.path.isdir(os.path.dirname(path)):
+          os.makedirs(os.path.dirname(path))
+        open(path, 'w').close()
+      def iglob(pattern):
+        return sorted(os.path.relpath(path, root).replace(os.sep, '/')
+                      for path in globre.iglob(pattern, root))
+      self.assertEqual(iglob('*.txt'), ['f.txt'])
+      self.assertEqual(iglob('a/*'), ['a/b', 'a/e.txt'])
+      self.assertEqual(iglob('a/b/c.txt'), ['a/b/c.txt'])
+      self.assertEqual(iglob('a/b/x.txt'), [])
+      self.assertEqual(iglob('**.txt'), ['a/b/c.txt', 'a/e.txt', 'f.txt', 'g/h/i/j.txt'])
+      self.assertEqual(iglob('?/**/*.txt'), ['a/b/c.txt', 'g/h/i/j.txt'])
+      self.assertEqual(iglob('a/[b]/*'), ['a/b/c.txt', 'a/b/d.ini'])
+      self.assertEqual(iglob(r'a/**{\\.ini}'), ['a/b/d.ini'])
+      gset = globre.GlobSet(['a/b/*.ini', 'g/**/j.*'])
+      self.assertEqual(iglob(gset), ['a/b/d.ini', 'g/h/i/j.txt'])
+    finally:
+      shutil.rmtree(root)
+  #----------------------------------------------------------------------------
+  def test_parallel_filter(self):
+    names = ['/dir%d/file%d.%s' % (idx % 7, idx, ('txt', 'ini', 'log')[idx % 3])
+             for idx in range(1000)]
+    patterns = ['/dir1/*.txt', '/dir[23]/**.ini', r'/dir4/{file\\d+}.log']
+    expected = list(globre.filter_many(patterns, names))
+    self.assertEqual(
+      list(globre.parallel_filter(patterns, iter(names), workers=2, chunksize=64)),
+      expected)
+    self.assertEqual(
+      sorted(globre.parallel_filter(
+        globre.GlobSet(patterns), names, workers=2, chunksize=64, ordered=False)),
+      sorted(expected))
+    # errors of the workers are raised in unordered mode too
+    with self.assertRaises(Exception):
+      list(globre.parallel_filter(
+        patterns, names + [None], workers=2, chunksize=64, ordered=False))
+  #----------------------------------------------------------------------------
+  def test_afilter(self):
+    if sys.version_info < (3, 6):
+      return
+    import asyncio, concurrent.futures
+    class Source(object):
+      # a stub of an asynchronous listing
+      def __init__(self, items):
+        self.items = list(items)
+        self.read  = 0
+      def __aiter__(self):
+        return self
+      def __anext__(self):
+        if self.read >= len(self.items):
+          raise StopAsyncIteration
+        self.read += 1
+        future = asyncio.get_event_loop().create_future()
+        future.set_result(self.items[self.read - 1])
+        return future
+    loop = asyncio.new_event_loop()
+    def collect(agen, count=None):
+      ret = []
+      try:
+        while count is None or len(ret) < count:
+          ret.append(loop.run_until_complete(agen.__anext__()))
+      except StopAsyncIteration:
+        pass
+      loop.run_until_complete(agen.aclose())
+      return ret
+    names = ['logs/a/%d.gz' % idx for idx in range(300)] + ['x/%d' % idx for idx in range(300)]
+    prefixes = []
+    def lister(prefix):
+      prefixes.append(prefix)
+      return Source(names)
+    try:
+      self.assertEqual(
+        collect(globre.afilter('logs/*/1?.gz', lister)),
+        ['logs/a/1%d.gz' % idx for idx in range(10)])
+      self.assertEqual(prefixes, ['logs/'])
+      self.assertEqual(
+        collect(globre.afilter('lo{|x/1.*}', lister)),
+        [name for name in names if globre.match('lo{|x/1.*}', name)])
+      self.assertEqual(prefixes, ['logs/', ''])
+      expected = list(globre.filter_many(['logs/*/1*.gz', 'x/2?'], names))
+      self.assertEqual(
+        collect(globre.afilter(
+          ['logs/*/1*.gz', 'x/2?'], Source(names), batchsize=50, offload=100)),
+        expected)
+      self.assertEqual(
+        collect(globre.afilter(
+          globre.GlobSet(['logs/*/1*.gz', 'x/2?']), Source(names),
+          batchsize=50, offload=0)),
+        expected)
+      with concurrent.futures.ProcessPoolExecutor(1) as executor:
+        self.assertEqual(
+          collect(globre.afilter(
+            ['logs/*/1*.gz', 'x/2?'], Source(names), batchsize=100,
+            offload=0, executor=executor)),
+          expected)
+      # at most `maxpending` batches are read ahead
+      source = Source(names)
+      self.assertEqual(
+        collect(globre.afilter('**', source, batchsize=10, maxpending=2), 1),
+        names[:1])
+      self.assertEqual(source.read, 20)
+    finally:
+      loop.close()
+    self.assertEqual(globre.aio.prefix_hint(['a/b/c*', 'a/bx/**']), 'a/b')
+    self.assertEqual(globre.aio.prefix_hint('a/b\\c/*', sep='/\\'), 'a')
+    self.assertEqual(globre.aio.prefix_hint('a/*', flags=re.IGNORECASE), '')
+    self.assertEqual(globre.aio.prefix_hint([b'a/b*'], sep='/\\'), b'a')
+    self.assertEqual(globre.aio.prefix_hint([b'a/b*'], sep=b'/\\'), b'a')
+    self.assertEqual(globre.aio.prefix_hint(['a/b*', 'a{|x.*}']), '')
+    self.assertEqual(globre.aio.prefix_hint('ab{?}'), '')
+  #----------------------------------------------------------------------------
+  def test_fast_pattern(self):
+    for pattern in ('/foo/**', '**.txt', '/foo/**.txt', '**', r'/foo/\***'):
+      for flags in (0, globre.EXACT, re.DOTALL):
+        expr = globre.compile(pattern, flags=flags)
+        regex = globre.compile(pattern, flags=flags | globre.FORCE_RE)
+        if not flags & globre.EXACT and pattern.endswith('**'):
+          self.assertNotIsInstance(expr, globre.FastPattern)
+          continue
+        self.assertIsInstance(expr, globre.FastPattern)
+        self.assertNotIsInstance(regex, globre.FastPattern)
+        self.assertEqual(expr.pattern, regex.pattern)
+        for name in ('/foo/bar', '/foo/bar.txt', '/foo/a/b.txt', 'x/foo/b.txt',
+                     'a.txt', '', '/foo/a\nb.txt', '/foo/*.txt.txt'):
+          for method in ('match', 'search'):
+            result = getattr(expr, method)(name)
+            expected = getattr(regex, method)(name)
+            self.assertEqual(result is None, expected is None)
+            if result is not None:
+              self.assertEqual(result.span(), expected.span())
+              self.assertEqual(result.group(), expected.group())
+              self.assertEqual(result[0], expected[0])
+    for pattern in ('/foo/bar', '/foo/*.txt', '/foo/?.txt', '/foo/**/*.txt'):
+      self.assertNotIsInstance(globre.compile(pattern), globre.FastPattern)
+    self.assertNotIsInstance(globre.compile('/**.txt', sep='/\\'), globre.FastPattern)
+    self.assertNotIsInstance(
+      globre.compile('**.txt', flags=re.IGNORECASE), globre.FastPattern)
+    expr = globre.compile('/foo/**.txt')
+    self.assertEqual(expr.sub('X', 'a/foo/b.txt'), 'aX')
+    self.assertIsNone(expr.match('/foo/b.txt', 1))
+    self.assertIsNotNone(expr.match('x/foo/b.txt', 1))
+  #----------------------------------------------------------------------------
+  def test_linear(self):
+    names = ('/foo/bar', '/foo/bar.txt', '/foo/a/b.txt', 'x/foo/b.txt',
+             'a.txt', '', '/foo/a\nb.txt', 'b.txt\n', '/foo/B.TXT')
+    for pattern in ('/foo/**', '**.txt', '/foo/*.txt', '**/?.txt', '*/[a-c]*.txt',
+                    '*', '**', 'foo', '[]a]*', r'/foo/\***'):
+      for flags in (0, globre.EXACT, re.DOTALL, re.IGNORECASE):
+        expr = globre.compile(pattern, flags=flags | globre.LINEAR)
+        regex = globre.compile(pattern, flags=flags | globre.FORCE_RE)
+        self.assertIsInstance(expr, globre.engine.LinearPattern)
+        self.assertEqual(expr.pattern, regex.pattern)
+        for name in names:
+          for method in ('match', 'search', 'fullmatch'):
+            for args in ((), (1,), (1, 5)):
+              result = getattr(expr, method)(name, *args)
+              expected = getattr(regex, method)(name, *args)
+              self.assertEqual(result is None, expected is None)
+              if result is not None:
+                self.assertEqual(result.span(), expected.span())
+    self.assertTrue(globre.match('**/a/**/b/**/c*', '/x/a/y/b/z/c.txt', flags=globre.LINEAR))
+    # would backtrack for a very long time with the regex
+    path = '/a' * 5000 + '/b' * 5000 + '/x'
+    self.assertIsNone(globre.match('**/a/**/b/**/c*', path, flags=globre.LINEAR))
+    self.assertIsNone(globre.search('*a*a*a*a*a*a*b', 'a' * 5000, flags=globre.LINEAR))
+    for pattern in ('/foo/{\\d+}', r'[a\]b]'):
+      with self.assertRaises(ValueError):
+        globre.compile(pattern, flags=globre.LINEAR)
+    with self.assertRaises(ValueError):
+      globre.compile('foo', flags=globre.LINEAR | re.MULTILINE)
+  #----------------------------------------------------------------------------
+  def test_capture(self):
+    expr = globre.compile('/users/*/**.[ch]', flags=globre.CAPTURE | globre.EXACT)
+    self.assertIsInstance(expr, globre.CapturePattern)
+    self.assertEqual(expr.indexes, (1, 3, 5))
+    match = expr.match('/users/bob/src/main.c')
+    self.assertIsInstance(match, globre.Match)
+    self.assertEqual(match.values(), {1: 'bob', 3: 'src/main', 5: 'c'})
+    self.assertEqual(
+      match.wildcards(),
+      [(1, 'bob', (7, 10)), (3, 'src/main', (11, 19)), (5, 'c', (20, 21))])
+    self.assertEqual(match.value(3), 'src/main')
+    self.assertEqual(match.wildcard_span(3), (11, 19))
+    # the regex semantics are unchanged
+    self.assertEqual(match.span(), (0, 21))
+    self.assertEqual(match.span(0), (0, 21))
+    self.assertEqual(match[0], '/users/bob/src/main.c')
+    self.assertEqual(match[1], 'bob')
+    self.assertEqual(match.group(), '/users/bob/src/main.c')
+    self.assertIsNone(expr.match('/users/bob/main.txt'))
+    # inline regex groups do not shift the wildcard indexes
+    match = globre.search(r'/{(a)(b)}/?', 'x/ab/y', flags=globre.CAPTURE)
+    self.assertEqual(match.wildcards(), [(3, 'y', (5, 6))])
+    self.assertEqual(match.group(1), 'a')
+    self.assertNotIsInstance(globre.compile('**.txt'), globre.CapturePattern)
+    self.assertNotIsInstance(
+      globre.compile('**.txt', flags=globre.CAPTURE), globre.FastPattern)
+    with self.assertRaises(ValueError):
+      globre.compile('a*', flags=globre.CAPTURE | globre.LINEAR)
+  #----------------------------------------------------------------------------
+  def test_persist(self):
+    patterns = ['/foo/**.ini', '/foo/*.txt', r'/foo/{\\d+}.log', '']
+    root = tempfile.mkdtemp()
+    try:
+      path = os.path.join(root, 'globs.bin')
+      self.assertIsNone(globre.persist.load(path, patterns))
+      built = globre.persist.load_or_build(path, patterns)
+      self.assertTrue(os.path.exists(path))
+      self.assertIsNone(globre.persist.load(path, patterns[:-1]))
+      self.assertIsNone(globre.persist.load(path, patterns, sep='!'))
+      loaded = globre.persist.load(path, patterns)
+      self.assertEqual(loaded.prefixes, ['/foo/', '/foo/', '', ''])
+      self.assertEqual(loaded.regexes, built.regexes)
+      self.assertEqual(loaded.programs, built.programs)
+      for name in ('/foo/a/b.ini', '/foo/x.txt', '/foo/12.log', '', '/foo/x.log'):
+        self.assertEqual(
+          loaded.globset.matches(name), globre.GlobSet(patterns).matches(name))
+        self.assertEqual(
+          loaded.index.match(name), globre.PrefixIndex(patterns).match(name))
+      with open(path, 'wb') as fp:
+        fp.write(b'garbage')
+      self.assertIsNone(globre.persist.load(path, patterns))
+      self.assertEqual(globre.persist.load_or_build(path, patterns).regexes, built.regexes)
+      self.assertIsNotNone(globre.persist.load(path, patterns))
+      if os.name == 'posix':
+        self.assertEqual(os.stat(path).st_mode & 0o777, globre.persist.MODE)
+      # a valid header with a truncated body is rebuilt
+      with open(path, 'rb') as fp:
+        data = fp.read()
+      with open(path, 'wb') as fp:
+        fp.write(data[:-5])
+      self.assertIsNone(globre.persist.load(path, patterns))
+      self.assertEqual(globre.persist.load_or_build(path, patterns).regexes, built.regexes)
+      self.assertIsNotNone(globre.persist.load(path, patterns))
+      # the stored regexes match strings with any of the separators
+      built = globre.persist.build(
+        ['/foo/*.ini', '/b/{x+}'], sep='/\\', flags=globre.NORMSEP)
+      for name, expected in (('\\foo\\a.ini', 0), ('/b\\xx', 1)):
+        self.assertEqual(built.index.match(name), [built.patterns[expected]])
+        self.assertEqual(built.globset.matches(name), [expected])
+      # files are tied to the translation code, even without a version
+      self.assertEqual(len(globre.persist._fingerprint()), 64)
+    finally:
+      shutil.rmtree(root)
+  #----------------------------------------------------------------------------
+  def test_bench(self):
+    from globre import bench
+    try:
+      from StringIO import StringIO
+    except ImportError:
+      from io import StringIO
+    stdout, sys.stdout = sys.stdout, StringIO()
+    try:
+      self.assertEqual(bench.main(['-s', '2', '-t', '0', 'tokenizer', 'match_hit']), 0)
+      output = sys.stdout.getvalue()
+    finally:
+      sys.stdout = stdout
+    output = json.loads(output)
+    self.assertIn('globre', output)
+    self.assertEqual(output['fingerprint'], globre.persist._fingerprint())
+    results = output['benchmarks']
+    self.assertEqual(
+      [result['name'] for result in results],
+      ['tokenizer_long', 'tokenizer_escaped', 'match_hit'])
+    self.assertIn('patterns_10000_globset_cold', [func.__name__ for func in bench.BENCHMARKS])
+    for result in results:
+      self.assertEqual(result['samples'], 2)
+      self.assertGreater(result['ops_per_sec'], 0)
+      self.assertEqual(sorted(result['percentiles']), ['p0', 'p100', 'p50', 'p90', 'p99'])
 
 #------------------------------------------------------------------------------
 # end of $Id$
@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+#------------------------------------------------------------------------------
+# file: $Id$
+# auth: metagriffin <mg.github@uberdev.org>
+# date: 2026/10/18
+# copy: (C) Copyright 2013-EOT metagriffin -- see LICENSE.txt
+#------------------------------------------------------------------------------
+# This software is free software: you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This software is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see http://www.gnu.org/licenses/.
+#------------------------------------------------------------------------------
+
+import os, re
+
+from . import engine
+from .globset import GlobSet
+
+#------------------------------------------------------------------------------
+def _listdir(path, followlinks):
+  if hasattr(os, 'scandir'):
+    try:
+      for entry in os.scandir(path):
+        try:
+          isdir = entry.is_dir(follow_symlinks=followlinks)
+        except OSError:
+          isdir = False
+        yield (entry.name, isdir)
+    except OSError:
+      pass
+    return
+  try:
+    names = os.listdir(path)
+  except OSError:
+    return
+  for name in names:
+    full = os.path.join(path, name)
+    yield (name, os.path.isdir(full) and (followlinks or not os.path.islink(full)))
+
+#------------------------------------------------------------------------------
+def _lookup(path, name, followlinks):
+  full = os.path.join(path, name)
+  if not os.path.lexists(full):
+    return ()
+  return ((name, os.path.isdir(full) and (followlinks or not os.path.islink(full))),)
+
+#------------------------------------------------------------------------------
+def _literal(automaton, state, sep):
+  # returns the only entry name that can lead out of `state` if there
+  # is exactly one pattern "thread" in it and that thread requires a
+  # fully literal path component, otherwise ``None``.
+  if len(state.ids) != 1:
+    return None
+  anysep = '[' + re.escape(sep) + ']'
+  sid = next(iter(state.ids))
+  name = ''
+  while True:
+    kind  = automaton.kinds[sid]
+    value = automaton.values[sid]
+    if kind is None \
+        or ( kind == engine.CHAR and value in sep ) \
+        or ( kind == engine.CLASS and value == anysep ):
+      return name or None
+    if kind != engine.CHAR or automaton.loops[sid] \
+        or len(automaton.nexts[sid]) != 1:
+      return None
+    name += value
+    sid   = automaton.nexts[sid][0]
+
+#------------------------------------------------------------------------------
+def iglob(pattern, root=None, sep=None, flags=0, followlinks=False):
+  '''
+  Walks the directory tree under `root` (which defaults to the current
+  directory) and lazily generates the paths of all files and
+  directories whose path relative to `root` matches `pattern` in its
+  entirety (i.e. like `globre.match`). The `pattern` can either be a
+  glob string, which is compiled with `sep` and `flags`, or a
+  `globre.GlobSet`, in which case all of its patterns share a single
+  walk. The relative paths are built with the first character of
+  `sep` (by default ``"/"``) as separator, regardless of ``os.sep``.
+
+  Only the directories that can still lead to a match are descended
+  into: path components that are fully literal are looked up directly
+  instead of listing their parent directory, ``*`` and ``?`` never
+  leave the current directory, and only ``**`` (or ranges that match
+  the separator) recurse. Patterns that inline a regex (``{...}``)
+  cannot be analyzed and therefore cause the entire tree to be walked.
+
+  Symbolic links to directories are only descended into if
+  `followlinks` is truthy.
+  '''
+  if not isinstance(pattern, GlobSet):
+    pattern = GlobSet([pattern], sep=sep, flags=flags)
+  automaton = pattern.automaton
+  fallback  = pattern.fallback
+  sep       = pattern.sep or '/'
+  sepchar   = sep[0]
+  dead      = automaton.dead
+  step      = automaton.step
+  literals  = {}
+  stack     = [(root or os.curdir, '', automaton.start)]
+  while stack:
+    path, rel, state = stack.pop()
+    if fallback:
+      entries = _listdir(path, followlinks)
+    else:
+      if state not in literals:
+        literals[state] = _literal(automaton, state, sep)
+      name = literals[state]
+      if name is not None:
+        entries = _lookup(path, name, followlinks)
+      else:
+        entries = _listdir(path, followlinks)
+    for name, isdir in entries:
+      cur = state
+      for char in name:
+        cur = cur.next.get(char) or step(cur, char)
+        if cur is dead:
+          break
+      if cur is dead and not fallback:
+        continue
+      relname = rel + name
+      if name.endswith('\n'):
+        matched = bool(automaton.run(relname))
+      else:
+        matched = bool(cur.accepts)
+      if not matched and fallback:
+        matched = any(match(relname) for idx, match in fallback)
+      if matched:
+        yield os.path.join(path, name)
+      if not isdir:
+        continue
+      if cur is not dead:
+        cur = step(cur, sepchar)
+      if cur is not dead or fallback:
+        stack.append((os.path.join(path, name), relname + sepchar, cur))
+
+#------------------------------------------------------------------------------
+# end of $Id$
+#------------------------------------------------------------------------------